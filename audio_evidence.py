@@ -0,0 +1,121 @@
+# audio_evidence.py
+"""
+Keeps the last few seconds of microphone PCM and saves them when an SOS fires.
+
+PCMRingBuffer is one preallocated bytearray written through a memoryview, so
+memory stays constant however long voice activation runs and a chunk costs a
+single copy into the ring. Positions are absolute byte counts since
+listening started, which lets a capture name "PRE seconds before the
+trigger to POST seconds after" without copying anything at trigger time.
+EvidenceRecorder.capture() only notes the current position; a background
+thread waits for the post-trigger audio, then writes the range as a
+gzip-compressed WAV.
+"""
+import gzip, itertools, os, threading, time, wave
+
+PRE_SECONDS = 30
+POST_SECONDS = 30
+EVIDENCE_DIR = os.path.join(os.getcwd(), "evidence")
+
+
+class PCMRingBuffer:
+    def __init__(self, seconds, rate=16000, width=2):
+        self.rate = rate
+        self.width = width
+        self.capacity = int(seconds * rate) * width
+        self._buf = bytearray(self.capacity)
+        self._view = memoryview(self._buf)
+        self.written = 0          # bytes ever written; the ring holds the last `capacity`
+        self._cond = threading.Condition()
+
+    def seconds_to_bytes(self, seconds):
+        return int(seconds * self.rate) * self.width
+
+    def write(self, data):
+        data = memoryview(data).cast("B")
+        cap = self.capacity
+        with self._cond:
+            if len(data) > cap:
+                self.written += len(data) - cap
+                data = data[-cap:]
+            n = len(data)
+            pos = self.written % cap
+            first = min(n, cap - pos)
+            self._view[pos:pos + first] = data[:first]
+            if first < n:
+                self._view[:n - first] = data[first:]
+            self.written += n
+            self._cond.notify_all()
+
+    def read(self, start, end):
+        """Bytes between absolute positions, clamped to what is still held."""
+        with self._cond:
+            start = max(start, self.written - self.capacity, 0)
+            end = min(end, self.written)
+            start += -start % self.width    # round up: rounding down could reach overwritten bytes
+            if end <= start:
+                return b""
+            cap = self.capacity
+            a, b = start % cap, end % cap or cap
+            if a < b:
+                return bytes(self._view[a:b])
+            return bytes(self._view[a:]) + bytes(self._view[:b])
+
+    def wait_until(self, position, timeout):
+        """Block until `position` bytes were written or `timeout` passes. Returns the written count."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.written < position:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self.written
+
+
+class EvidenceRecorder:
+    def __init__(self, rate=16000, pre=PRE_SECONDS, post=POST_SECONDS, directory=EVIDENCE_DIR):
+        self.pre = pre
+        self.post = post
+        self.directory = directory
+        # Room for a capture's whole window plus slack for a slow writer thread
+        self.buffer = PCMRingBuffer(pre + post + 5, rate=rate)
+        self._seq = itertools.count(1)
+
+    def write(self, data):
+        self.buffer.write(data)
+
+    def capture(self, label="sos"):
+        """
+        Save PRE seconds before now and POST seconds after, in the background.
+        Returns the path the file will be written to.
+        """
+        mark = self.buffer.written
+        now = time.time()
+        # Milliseconds and a sequence number keep same-second captures apart
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+        path = os.path.join(self.directory, f"{label}-{stamp}-{next(self._seq)}.wav.gz")
+        threading.Thread(target=self._save, args=(mark, path), name="evidence-writer", daemon=True).start()
+        return path
+
+    def _save(self, mark, path):
+        buf = self.buffer
+        start = mark - buf.seconds_to_bytes(self.pre)
+        end = mark + buf.seconds_to_bytes(self.post)
+        # Listening may stop early; don't wait much longer than real time
+        buf.wait_until(end, timeout=self.post + 2)
+        pcm = buf.read(start, end)
+        if not pcm:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with gzip.open(path, "wb", compresslevel=6) as gz:
+                with wave.open(gz, "wb") as wav:
+                    wav.setnchannels(1)
+                    wav.setsampwidth(buf.width)
+                    wav.setframerate(buf.rate)
+                    wav.setnframes(len(pcm) // buf.width)
+                    wav.writeframes(pcm)
+            print(f"[INFO] Saved {len(pcm) / (buf.rate * buf.width):.1f}s of audio evidence to {path}")
+        except Exception as e:
+            print("[ERROR] Failed to save audio evidence:", e)
@@ -0,0 +1,193 @@
+# bench_shake.py
+"""
+Replay recorded accelerometer traces through the shake detector.
+
+    python bench_shake.py walk.shk pocket.shk            # as fast as possible
+    python bench_shake.py walk.shk --speed 1              # real time, via the sampler thread
+    python bench_shake.py --synthesize demo.shk --minutes 30
+
+For every sensitivity level it reports how many labelled shakes were caught,
+detection latency from shake onset, false positives per hour, CPU time
+per sample and sampler wakeups per hour. Fast replay feeds ShakeDetector directly; --speed runs
+AccelerometerSampler (adaptive rate included) against a clock scaled by the
+given factor.
+"""
+import argparse, bisect, math, random, statistics, threading, time
+
+import shake_detector as sd
+from shake_detector import AccelerometerSampler, ShakeDetector, shake_threshold_for
+from shake_trace import read_labels, read_trace, write_trace
+from sos_trace import percentile
+
+MATCH_GRACE = 0.5   # seconds after a labelled shake a trigger still counts as catching it
+
+
+# -------------------- Replay --------------------
+def replay_fast(samples, rate, threshold):
+    """Feed samples straight into a detector. Returns (trigger times, samples fed, cpu seconds)."""
+    detector = ShakeDetector(threshold, rate=rate)
+    triggers = []
+    prev_t = None
+    cpu = time.process_time()
+    for t, x, y, z in samples:
+        # Recordings made at the idle rate have gaps; fill them as the sampler does
+        if prev_t is not None:
+            skipped = int(round((t - prev_t) * rate)) - 1
+            if skipped > 0:
+                detector.hold(x, y, z, skipped)
+        if detector.add(t, x, y, z):
+            triggers.append(t)
+        prev_t = t
+    return triggers, len(samples), time.process_time() - cpu
+
+
+def replay_clocked(samples, rate, threshold, speed, idle_rate=sd.IDLE_RATE):
+    """
+    Run the real sampler thread against the recording played back `speed`
+    times faster. Returns (trigger times, samples read, cpu seconds, wakeups).
+    """
+    times = [s[0] for s in samples]
+    duration = times[-1] if times else 0.0
+    done = threading.Event()
+    triggers = []
+    t0 = time.monotonic()
+
+    def read():
+        pos = (time.monotonic() - t0) * speed
+        if pos >= duration:
+            done.set()
+        i = max(0, bisect.bisect_right(times, pos) - 1)
+        return samples[i][1:]
+
+    def on_shake(t, energy):
+        triggers.append((t - t0) * speed)
+
+    detector = ShakeDetector(threshold, rate=rate * speed, lag=sd.LAG_SECONDS / speed,
+                             window=sd.WINDOW_SECONDS / speed, cooldown=sd.COOLDOWN_SECONDS / speed)
+    sampler = AccelerometerSampler(read, on_shake, detector, rate=rate * speed,
+                                   idle_rate=idle_rate * speed if idle_rate else None,
+                                   idle_after=sd.IDLE_AFTER_SECONDS / speed)
+    cpu = time.process_time()
+    sampler.start()
+    done.wait()
+    sampler.stop()
+    return triggers, sampler.samples, time.process_time() - cpu, sampler.wakeups
+
+
+def score(triggers, labels):
+    """Return (latencies of caught shakes, missed count, false positive count)."""
+    latencies, missed = [], 0
+    matched = set()
+    for start, end in labels:
+        hits = [t for t in triggers if start <= t <= end + MATCH_GRACE]
+        if hits:
+            latencies.append(hits[0] - start)
+            matched.update(hits)
+        else:
+            missed += 1
+    false_positives = sum(1 for t in triggers if t not in matched)
+    return latencies, missed, false_positives
+
+
+# -------------------- Synthetic Traces --------------------
+def synthesize(path, minutes, rate, seed=1):
+    """Still phone, walking and handling, with labelled shakes mixed in."""
+    rng = random.Random(seed)
+    n = int(minutes * 60 * rate)
+    samples, labels = [], []
+    activity, until = "still", 0.0
+    for i in range(n):
+        t = i / rate
+        if t >= until:
+            activity = rng.choices(["still", "walk", "handle", "shake"], [5, 3, 1, 1])[0]
+            length = rng.uniform(0.6, 1.5) if activity == "shake" else rng.uniform(5, 30)
+            until = t + length
+            freq, amp, start = rng.uniform(3.5, 6), rng.uniform(8, 16), t
+            if activity == "shake":
+                labels.append({"start": t, "end": until, "label": "shake"})
+        x, y, z = rng.gauss(0, 0.05), rng.gauss(0, 0.05), 9.81 + rng.gauss(0, 0.05)
+        if activity == "walk":
+            x += 1.5 * math.sin(2 * math.pi * 1.8 * t)
+            z += 2.5 * abs(math.sin(2 * math.pi * 1.8 * t))
+        elif activity == "handle":
+            x += rng.gauss(0, 1.2)
+            y += rng.gauss(0, 1.2)
+        elif activity == "shake":
+            phase = 2 * math.pi * freq * (t - start)
+            x += amp * math.sin(phase)
+            y += 0.3 * amp * math.sin(phase + 1.0)
+        samples.append((t, x, y, z))
+    write_trace(path, samples, rate, labels)
+    print(f"wrote {path}: {len(samples)} samples, {len(labels)} labelled shakes")
+
+
+# -------------------- Report --------------------
+def run(paths, sensitivities, speed, idle_rate=sd.IDLE_RATE):
+    traces = []
+    for path in paths:
+        rate, samples = read_trace(path)
+        if samples:
+            traces.append((path, rate, samples, read_labels(path)))
+    hours = sum(s[-1][0] for _, _, s, _ in traces) / 3600.0
+    shakes = sum(len(l) for _, _, _, l in traces)
+    print(f"traces {len(traces)}, {hours * 60:.1f} min, {shakes} labelled shakes, "
+          f"{'fast' if not speed else f'x{speed:g} clocked, idle rate {idle_rate or 0:g} Hz'} replay")
+    print(f"{'sens':>4} {'thresh':>6} {'caught':>8} {'p50 ms':>7} {'p95 ms':>7} {'FP/h':>7} {'us/sample':>9} "
+          f"{'wake/h':>8}")
+
+    for sensitivity in sensitivities:
+        threshold = shake_threshold_for(sensitivity)
+        latencies, missed, false_positives, fed, cpu, wakeups = [], 0, 0, 0, 0.0, 0
+        for _, rate, samples, labels in traces:
+            if speed:
+                triggers, n, c, w = replay_clocked(samples, rate, threshold, speed, idle_rate)
+            else:
+                # Fed directly: one wakeup per recorded sample
+                triggers, n, c = replay_fast(samples, rate, threshold)
+                w = n
+            lat, miss, fp = score(triggers, labels)
+            latencies += lat
+            missed += miss
+            false_positives += fp
+            fed += n
+            cpu += c
+            wakeups += w
+        caught = f"{len(latencies)}/{len(latencies) + missed}"
+        p50 = statistics.median(latencies) * 1000 if latencies else float("nan")
+        p95 = percentile(latencies, 95) * 1000 if latencies else float("nan")
+        fph = false_positives / hours if hours else 0.0
+        wph = wakeups / hours if hours else 0.0
+        print(f"{sensitivity:>4} {threshold:>6.1f} {caught:>8} {p50:>7.0f} {p95:>7.0f} {fph:>7.1f} "
+              f"{cpu / max(fed, 1) * 1e6:>9.1f} {wph:>8.0f}")
+
+
+def parse_levels(text):
+    if "-" in text:
+        lo, hi = text.split("-", 1)
+        return list(range(int(lo), int(hi) + 1))
+    return [int(v) for v in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="*", help="recordings made with shake_trace.TraceRecorder")
+    parser.add_argument("--sensitivity", type=parse_levels, default=list(range(1, 11)),
+                        help="levels to test, e.g. 1-10 or 3,5,7")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="clocked replay speed (1 = real time); 0 feeds the detector directly")
+    parser.add_argument("--synthesize", metavar="PATH", help="write a synthetic labelled trace and exit")
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--rate", type=float, default=sd.SAMPLE_RATE)
+    parser.add_argument("--idle-rate", type=float, default=sd.IDLE_RATE,
+                        help="sampler rate while still, for clocked replay; 0 disables adaptive sampling")
+    args = parser.parse_args()
+    if args.synthesize:
+        synthesize(args.synthesize, args.minutes, args.rate)
+        return
+    if not args.traces:
+        parser.error("no traces given")
+    run(args.traces, args.sensitivity, args.speed, args.idle_rate)
+
+
+if __name__ == "__main__":
+    main()
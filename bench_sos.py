@@ -0,0 +1,73 @@
+# bench_sos.py
+"""
+End-to-end SOS fan-out benchmark against the loopback SMSC.
+
+    python bench_sos.py --recipients 1000 --latency 0.005 --failure-rate 0.01
+
+Alerts go through floating_button.send_sms and SOSDispatcher exactly as in
+the app; only the transport is swapped for the local fake SMSC.
+"""
+import argparse, os, statistics, tempfile, time
+
+import sms_transport
+from sms_transport import LoopbackSMSC, LoopbackTransport
+from sos_dispatch import SOSDispatcher, WORKERS
+from sos_outbox import Outbox
+from sos_trace import percentile
+
+
+def run(recipients, latency, failure_rate, workers, rate, burst, unix, journal):
+    address = os.path.join(tempfile.gettempdir(), "sos_smsc.sock") if unix else ("127.0.0.1", 0)
+    smsc = LoopbackSMSC(address, latency=latency, failure_rate=failure_rate).start()
+    transport = LoopbackTransport(smsc.address)
+    sms_transport.set_transport(transport)
+
+    outbox = None
+    if journal:
+        outbox = Outbox(os.path.join(tempfile.mkdtemp(), "bench_outbox.jsonl"))
+    dispatcher = SOSDispatcher(workers=workers, rate=rate, burst=burst, backoff=0.01, outbox=outbox)
+
+    # Spread recipients across a few network prefixes, like a real phone book
+    numbers = [f"09{17 + i % 4}{i:07d}" for i in range(recipients)]
+    message = "EMERGENCY! Trigger: Benchmark. Location: https://maps.google.com/?q=14.5995,120.9842"
+
+    start = time.monotonic()
+    batch = dispatcher.submit(numbers, message)
+    submitted = time.monotonic()
+    batch.wait()
+    end = time.monotonic()
+
+    arrivals = [t - start for t, _, _ in smsc.messages]
+    dispatcher.shutdown()
+    transport.close()
+    smsc.stop()
+    if outbox is not None:
+        outbox.close()
+
+    print(f"recipients        {recipients}")
+    print(f"workers/rate      {workers} / {rate:g} per carrier (burst {burst:g})")
+    print(f"delivered/failed  {len(batch.sent)} / {len(batch.failed)}")
+    print(f"submit returned   {(submitted - start) * 1000:.2f} ms")
+    if arrivals:
+        print(f"first send        {min(arrivals) * 1000:.2f} ms")
+        print(f"p50 / p95 arrival {statistics.median(arrivals) * 1000:.1f} / {percentile(arrivals, 95) * 1000:.1f} ms")
+    print(f"total             {(end - start) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.005, help="SMSC seconds per message")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--rate", type=float, default=1e9, help="per-carrier sends/s (default: unlimited)")
+    parser.add_argument("--burst", type=float, default=1e9)
+    parser.add_argument("--unix", action="store_true", help="use a Unix socket instead of TCP")
+    parser.add_argument("--journal", action="store_true", help="journal sends through an outbox")
+    args = parser.parse_args()
+    run(args.recipients, args.latency, args.failure_rate, args.workers, args.rate, args.burst,
+        args.unix, args.journal)
+
+
+if __name__ == "__main__":
+    main()
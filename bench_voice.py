@@ -0,0 +1,181 @@
+# bench_voice.py
+"""
+Replay WAV files through the voice activation pipeline.
+
+    python bench_voice.py street.wav office.wav --phrase "help me, tulong"
+    python bench_voice.py street.wav --speed 1 --no-vad --open-vocab
+
+Each file must be 16 kHz mono 16-bit PCM. Spoken activation phrases are
+labelled in <file>.labels.json as [{"start": s, "end": s}, ...] (seconds).
+The audio goes through SOSHandler._desktop_voice_loop exactly as in the app,
+with a fake stream in place of PyAudio: VAD gate, recognizer and phrase
+matching are the real ones, and a trigger is recorded where the handler
+would post it to the UI thread. Reports caught phrases, latency from the end of
+the phrase to the trigger (in audio time), false accepts per hour and CPU
+seconds per hour of audio.
+"""
+import argparse, json, os, statistics, threading, time, wave
+
+from shake_voice_handler import SOSHandler, UNKNOWN_WORD
+from sos_trace import percentile
+from voice_model import get_model_cache, MODEL_PATH
+
+RATE = 16000
+TAIL_SECONDS = 1.5    # silence appended so the last utterance is closed
+MATCH_GRACE = 2.0     # seconds after a labelled phrase a trigger still counts
+
+
+def read_labels(path):
+    labels_path = path + ".labels.json"
+    if not os.path.exists(labels_path):
+        return []
+    with open(labels_path, "r") as f:
+        return [(l["start"], l["end"]) for l in json.load(f)]
+
+
+class WavStream:
+    """Stands in for a PyAudio input stream; `speed` 0 reads as fast as possible."""
+
+    def __init__(self, path, handler, speed=0.0):
+        self.wav = wave.open(path, "rb")
+        if (self.wav.getframerate(), self.wav.getnchannels(), self.wav.getsampwidth()) != (RATE, 1, 2):
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit PCM")
+        self.handler = handler
+        self.speed = speed
+        self.frames = 0
+        self.duration = self.wav.getnframes() / RATE
+        self._tail = int(TAIL_SECONDS * RATE)
+        self._started = None
+
+    @property
+    def position(self):
+        """Seconds of audio delivered so far."""
+        return self.frames / RATE
+
+    def read(self, n, exception_on_overflow=True):
+        if self._started is None:
+            self._started = time.monotonic()
+        data = self.wav.readframes(n)
+        if len(data) < n * 2 and self._tail > 0:
+            pad = min(self._tail, n - len(data) // 2)
+            data += b"\0\0" * pad
+            self._tail -= pad
+        if not data:
+            self.handler.is_listening = False
+            return b""
+        self.frames += len(data) // 2
+        if self.speed:
+            delay = self._started + self.position / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        self.wav.close()
+
+
+def load_model(path):
+    ready = threading.Event()
+    holder = []
+    get_model_cache().acquire(path, lambda model: (holder.append(model), ready.set()))
+    ready.wait()
+    if not holder or holder[0] is None:
+        raise SystemExit(f"could not load Vosk model from {path}")
+    return holder[0]
+
+
+class _BenchHandler(SOSHandler):
+    def start_gps(self):
+        pass   # no location subscription or IP lookups inside the CPU measurement
+
+
+def make_handler(model, phrases, vad, keyword_spotting):
+    handler = _BenchHandler(settings={"voice_enabled": False, "voice_phrase": phrases,
+                                   "voice_keyword_spotting": keyword_spotting,
+                                   "audio_evidence": False}, autostart=False)
+    handler.voice_model = model
+    handler.recognizer = handler._make_recognizer()
+    if not vad:
+        handler._vad = None
+    else:
+        from voice_vad import VoiceActivityGate
+        handler._vad = VoiceActivityGate(rate=RATE)
+    return handler
+
+
+def replay(path, model, phrases, vad, keyword_spotting, speed):
+    """Returns (trigger audio times, audio seconds, cpu seconds)."""
+    handler = make_handler(model, phrases, vad, keyword_spotting)
+    stream = WavStream(path, handler, speed)
+    handler.audio_stream = stream
+    handler.is_listening = True
+    # Time is audio heard so far, so phrase cooldowns hold at any replay speed;
+    # triggers are noted instead of being posted to the Kivy clock
+    handler._voice_clock = lambda: stream.position
+    triggers = []
+    handler._voice_triggered = lambda phrase, heard_at: triggers.append(heard_at)
+
+    cpu = time.process_time()
+    handler._desktop_voice_loop()
+    cpu = time.process_time() - cpu
+    stream.close()
+    return triggers, stream.duration, cpu
+
+
+def score(triggers, labels):
+    latencies, missed, matched = [], 0, set()
+    for start, end in labels:
+        hits = [t for t in triggers if start <= t <= end + MATCH_GRACE]
+        if hits:
+            latencies.append(max(0.0, hits[0] - end))
+            matched.update(hits)
+        else:
+            missed += 1
+    return latencies, missed, sum(1 for t in triggers if t not in matched)
+
+
+def run(paths, model_path, phrases, vad, keyword_spotting, speed):
+    model = load_model(model_path)
+    latencies, missed, false_accepts, audio, cpu = [], 0, 0, 0.0, 0.0
+    for path in paths:
+        triggers, seconds, used = replay(path, model, phrases, vad, keyword_spotting, speed)
+        lat, miss, fa = score(triggers, read_labels(path))
+        print(f"{os.path.basename(path)}: {len(triggers)} triggers, {len(lat)} caught, {miss} missed, "
+              f"{fa} false, {used:.1f} s CPU for {seconds:.0f} s audio")
+        latencies += lat
+        missed += miss
+        false_accepts += fa
+        audio += seconds
+        cpu += used
+
+    hours = audio / 3600.0
+    print()
+    print(f"config            vad={'on' if vad else 'off'}, "
+          f"{'keyword grammar' if keyword_spotting else 'open vocabulary'}, phrases: {phrases}")
+    print(f"audio             {audio / 60:.1f} min in {len(paths)} file(s)")
+    print(f"caught            {len(latencies)}/{len(latencies) + missed}")
+    if latencies:
+        print(f"latency p50 / p95 {statistics.median(latencies) * 1000:.0f} / {percentile(latencies, 95) * 1000:.0f} ms "
+              f"after the phrase ends")
+    print(f"false accepts/h   {false_accepts / hours if hours else 0.0:.1f}")
+    print(f"CPU s / audio h   {cpu / hours if hours else 0.0:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="+")
+    parser.add_argument("--phrase", default="help me", help="comma-separated activation phrases")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time; 0 = as fast as possible")
+    parser.add_argument("--no-vad", dest="vad", action="store_false", help="feed every chunk to the recognizer")
+    parser.add_argument("--open-vocab", dest="keyword_spotting", action="store_false",
+                        help=f"decode the full vocabulary instead of phrases + {UNKNOWN_WORD}")
+    args = parser.parse_args()
+    run(args.wavs, args.model, args.phrase, args.vad, args.keyword_spotting, args.speed)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,34 +9,16 @@ from kivymd.uix.button import MDRaisedButton
 from kivy.uix.popup import Popup
 from kivy.uix.label import Label
 
-import floating_button
-import contacts
-from shake_voice_handler import SOSHandler
-
-BUTTON_SETTINGS = {
-    "shake_enabled": False,
-    "shake_sensitivity": 5,
-    "voice_enabled": False,
-    "voice_phrase": "help me",
-    "voice_sensitivity": 5,
-    "floating_enabled": True,
-    "button_size": 50,
-    "countdown_enabled": True,
-    "countdown_seconds": 5
-}
+from observable_settings import get_settings
+from sos_trace import tracer, TRACE_FILE
 
 
 class SettingsScreen(Screen):
     def on_kv_post(self, base_widget):
+        # Widgets write to the persisted settings store; the app-wide SOS
+        # handler (created in SOSApp.build) observes it once per frame
         self.app = MDApp.get_running_app()
-
-        # Initialize SOS handler if not already
-        if not hasattr(self.app, "shake_voice_handler"):
-            self.app.shake_voice_handler = SOSHandler(
-                app=self.app,
-                settings=BUTTON_SETTINGS.copy(),
-                contacts=contacts
-            )
+        self.settings = get_settings()
 
         layout = self.ids.settings_layout
         layout.clear_widgets()
@@ -63,8 +45,14 @@ class SettingsScreen(Screen):
         save_btn.bind(on_release=lambda x: self.save_settings())
         layout.add_widget(save_btn)
 
-        # Initialize floating button
-        self._update_floating_button()
+        # ---------------- Latency Summary ----------------
+        latency_btn = MDRaisedButton(
+            text="SOS Latency",
+            size_hint_y=None,
+            height=45
+        )
+        latency_btn.bind(on_release=lambda x: self.show_latency_summary())
+        layout.add_widget(latency_btn)
 
     # ---------------- Panel Builders ----------------
     def _create_shake_panel(self, parent):
@@ -75,7 +63,7 @@ class SettingsScreen(Screen):
         # Enable checkbox
         row = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=40)
         row.add_widget(MDLabel(text="Enable", halign="left"))
-        self.shake_chk = MDCheckbox(active=BUTTON_SETTINGS["shake_enabled"])
+        self.shake_chk = MDCheckbox(active=self.settings.shake_enabled)
         self.shake_chk.bind(active=self.toggle_shake_settings)
         row.add_widget(self.shake_chk)
         box.add_widget(row)
@@ -83,10 +71,10 @@ class SettingsScreen(Screen):
         # Intensity slider
         box.add_widget(MDLabel(text="Intensity", halign="left", theme_text_color="Secondary"))
         self.shake_slider = MDSlider(min=1, max=10, step=1,
-                                     value=BUTTON_SETTINGS["shake_sensitivity"],
+                                     value=self.settings.shake_sensitivity,
                                      size_hint_y=None, height=40)
         self.shake_slider.bind(value=self.update_shake_sensitivity)
-        self.shake_slider.disabled = not BUTTON_SETTINGS["shake_enabled"]
+        self.shake_slider.disabled = not self.settings.shake_enabled
         box.add_widget(self.shake_slider)
         parent.add_widget(box)
 
@@ -98,7 +86,7 @@ class SettingsScreen(Screen):
         # Enable checkbox
         row = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=40)
         row.add_widget(MDLabel(text="Enable", halign="left"))
-        self.voice_chk = MDCheckbox(active=BUTTON_SETTINGS["voice_enabled"])
+        self.voice_chk = MDCheckbox(active=self.settings.voice_enabled)
         self.voice_chk.bind(active=self.toggle_voice_settings)
         row.add_widget(self.voice_chk)
         box.add_widget(row)
@@ -106,21 +94,23 @@ class SettingsScreen(Screen):
         # Activation phrase
         phrase_row = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=50)
         phrase_row.add_widget(MDLabel(text="Activation Phrase", size_hint_x=0.5, halign="left"))
-        self.voice_input = MDTextField(text=BUTTON_SETTINGS["voice_phrase"], multiline=False, size_hint_x=0.5)
-        self.voice_input.bind(text=self.update_voice_phrase)
+        self.voice_input = MDTextField(text=self.settings.voice_phrase, multiline=False, size_hint_x=0.5,
+                                       hint_text="Separate phrases with commas")
+        # Committed on Enter or focus loss: a half-typed phrase must never go live
+        self.voice_input.bind(on_text_validate=self.commit_voice_phrase, focus=self.on_voice_input_focus)
         phrase_row.add_widget(self.voice_input)
         box.add_widget(phrase_row)
 
         # Sensitivity
         box.add_widget(MDLabel(text="Sensitivity", halign="left", theme_text_color="Secondary"))
         self.voice_slider = MDSlider(min=1, max=10, step=1,
-                                     value=BUTTON_SETTINGS["voice_sensitivity"],
+                                     value=self.settings.voice_sensitivity,
                                      size_hint_y=None, height=40)
         self.voice_slider.bind(value=self.update_voice_sensitivity)
         box.add_widget(self.voice_slider)
 
-        self.voice_input.disabled = not BUTTON_SETTINGS["voice_enabled"]
-        self.voice_slider.disabled = not BUTTON_SETTINGS["voice_enabled"]
+        self.voice_input.disabled = not self.settings.voice_enabled
+        self.voice_slider.disabled = not self.settings.voice_enabled
 
         parent.add_widget(box)
 
@@ -132,7 +122,7 @@ class SettingsScreen(Screen):
         # Enable checkbox
         row = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=40)
         row.add_widget(MDLabel(text="Enable", halign="left"))
-        self.floating_chk = MDCheckbox(active=BUTTON_SETTINGS["floating_enabled"])
+        self.floating_chk = MDCheckbox(active=self.settings.floating_enabled)
         self.floating_chk.bind(active=self.toggle_floating_settings)
         row.add_widget(self.floating_chk)
         box.add_widget(row)
@@ -140,12 +130,12 @@ class SettingsScreen(Screen):
         # Button size
         size_row = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=50)
         size_row.add_widget(MDLabel(text="Button Size", size_hint_x=0.6, halign="left"))
-        self.size_input = MDTextField(text=str(BUTTON_SETTINGS["button_size"]), multiline=False, size_hint_x=0.4)
+        self.size_input = MDTextField(text=str(self.settings.button_size), multiline=False, size_hint_x=0.4)
         self.size_input.bind(text=self.update_floating_size)
         size_row.add_widget(self.size_input)
         box.add_widget(size_row)
 
-        self.size_input.disabled = not BUTTON_SETTINGS["floating_enabled"]
+        self.size_input.disabled = not self.settings.floating_enabled
         parent.add_widget(box)
 
     def _create_countdown_panel(self, parent):
@@ -156,7 +146,7 @@ class SettingsScreen(Screen):
         # Enable checkbox
         row = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=40)
         row.add_widget(MDLabel(text="Enable", halign="left"))
-        self.countdown_chk = MDCheckbox(active=BUTTON_SETTINGS["countdown_enabled"])
+        self.countdown_chk = MDCheckbox(active=self.settings.countdown_enabled)
         self.countdown_chk.bind(active=self.toggle_countdown_settings)
         row.add_widget(self.countdown_chk)
         box.add_widget(row)
@@ -164,80 +154,79 @@ class SettingsScreen(Screen):
         # Seconds
         seconds_row = MDBoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=50)
         seconds_row.add_widget(MDLabel(text="Countdown Seconds", size_hint_x=0.6, halign="left"))
-        self.countdown_input = MDTextField(text=str(BUTTON_SETTINGS["countdown_seconds"]), multiline=False, size_hint_x=0.4)
+        self.countdown_input = MDTextField(text=str(self.settings.countdown_seconds), multiline=False, size_hint_x=0.4)
         self.countdown_input.bind(text=self.update_countdown_seconds)
         seconds_row.add_widget(self.countdown_input)
         box.add_widget(seconds_row)
 
-        self.countdown_input.disabled = not BUTTON_SETTINGS["countdown_enabled"]
+        self.countdown_input.disabled = not self.settings.countdown_enabled
         parent.add_widget(box)
 
     # ---------------- Toggle / Update Methods ----------------
     def toggle_shake_settings(self, instance, value):
-        BUTTON_SETTINGS["shake_enabled"] = value
+        self.settings.shake_enabled = value
         self.shake_slider.disabled = not value
-        self.app.shake_voice_handler.update_settings(BUTTON_SETTINGS)
 
     def update_shake_sensitivity(self, instance, value):
-        BUTTON_SETTINGS["shake_sensitivity"] = int(value)
-        self.app.shake_voice_handler.update_settings(BUTTON_SETTINGS)
+        self.settings.shake_sensitivity = int(value)
 
     def toggle_voice_settings(self, instance, value):
-        BUTTON_SETTINGS["voice_enabled"] = value
+        self.settings.voice_enabled = value
         self.voice_input.disabled = not value
         self.voice_slider.disabled = not value
-        self.app.shake_voice_handler.update_settings(BUTTON_SETTINGS)
 
-    def update_voice_phrase(self, instance, value):
-        BUTTON_SETTINGS["voice_phrase"] = value
-        self.app.shake_voice_handler.save_voice_phrase(value)
+    def on_voice_input_focus(self, instance, focused):
+        if not focused:
+            self.commit_voice_phrase(instance)
+
+    def commit_voice_phrase(self, instance):
+        phrase = " ".join(instance.text.split())
+        if phrase:
+            self.settings.voice_phrase = phrase
+        else:
+            instance.text = self.settings.voice_phrase
 
     def update_voice_sensitivity(self, instance, value):
-        BUTTON_SETTINGS["voice_sensitivity"] = int(value)
-        self.app.shake_voice_handler.update_settings(BUTTON_SETTINGS)
+        self.settings.voice_sensitivity = int(value)
 
     def toggle_floating_settings(self, instance, value):
-        BUTTON_SETTINGS["floating_enabled"] = value
+        self.settings.floating_enabled = value
         self.size_input.disabled = not value
-        self._update_floating_button()
 
     def update_floating_size(self, instance, text):
         try:
-            size = max(20, min(120, int(text)))
-            BUTTON_SETTINGS["button_size"] = size
-            if BUTTON_SETTINGS["floating_enabled"]:
-                floating_button.set_button_size(size)
+            self.settings.button_size = max(20, min(120, int(text)))
         except ValueError:
             pass
 
     def toggle_countdown_settings(self, instance, value):
-        BUTTON_SETTINGS["countdown_enabled"] = value
+        self.settings.countdown_enabled = value
         self.countdown_input.disabled = not value
         if not value:
             self.app.shake_voice_handler.cancel_countdown()
         else:
-            BUTTON_SETTINGS["countdown_seconds"] = max(1, int(self.countdown_input.text or 5))
+            self.settings.countdown_seconds = max(1, int(self.countdown_input.text or 5))
 
     def update_countdown_seconds(self, instance, text):
         try:
-            BUTTON_SETTINGS["countdown_seconds"] = max(1, int(text))
+            self.settings.countdown_seconds = max(1, int(text))
         except ValueError:
             pass
 
-    # ---------------- Save & Apply ----------------
+    # ---------------- Save ----------------
     def save_settings(self):
         try:
-            BUTTON_SETTINGS["button_size"] = max(20, min(120, int(self.size_input.text)))
+            self.settings.button_size = max(20, min(120, int(self.size_input.text)))
         except ValueError:
-            BUTTON_SETTINGS["button_size"] = 50
+            self.settings.button_size = 50
 
         try:
-            BUTTON_SETTINGS["countdown_seconds"] = max(1, int(self.countdown_input.text))
+            self.settings.countdown_seconds = max(1, int(self.countdown_input.text))
         except ValueError:
-            BUTTON_SETTINGS["countdown_seconds"] = 5
+            self.settings.countdown_seconds = 5
 
-        self.app.shake_voice_handler.update_settings(BUTTON_SETTINGS)
-        self._update_floating_button()
+        # Changes are already saved in the background; make sure they are on disk
+        self.settings.flush()
 
         Popup(
             title="Saved",
@@ -245,9 +234,30 @@ class SettingsScreen(Screen):
             size_hint=(0.6, 0.3)
         ).open()
 
-    def _update_floating_button(self):
-        if BUTTON_SETTINGS["floating_enabled"]:
-            floating_button.enable_floating(callback=lambda: self.app.shake_voice_handler.send_alert("Button"))
-            floating_button.set_button_size(BUTTON_SETTINGS["button_size"])
+    # ---------------- Latency Tracing ----------------
+    def show_latency_summary(self):
+        summary = tracer.summary()
+        if summary:
+            lines = [f"{trigger}: p50 {s['p50_ms']:.0f} ms, p95 {s['p95_ms']:.0f} ms ({s['count']} alerts)"
+                     for trigger, s in sorted(summary.items())]
         else:
-            floating_button.disable_floating()
+            lines = ["No alerts traced yet."]
+        shake = self.app.shake_voice_handler.shake_stats()
+        if shake:
+            lines.append(f"\nShake sampler: {shake['wakeups_per_second']:.1f} wakeups/s "
+                         f"({shake['idle_wakeups']} of {shake['wakeups']} at idle rate)")
+
+        box = MDBoxLayout(orientation="vertical", spacing=10, padding=10)
+        box.add_widget(Label(text="Trigger to first SMS sent\n\n" + "\n".join(lines), halign="center"))
+        export_btn = MDRaisedButton(text="Export trace", size_hint_y=None, height=45)
+        box.add_widget(export_btn)
+        popup = Popup(title="SOS Latency", content=box, size_hint=(0.85, 0.5))
+
+        def export(*args):
+            try:
+                count = tracer.export_jsonl(TRACE_FILE)
+                export_btn.text = f"Exported {count} spans"
+            except Exception as e:
+                print("[ERROR] Failed to export trace:", e)
+        export_btn.bind(on_release=export)
+        popup.open()
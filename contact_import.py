@@ -0,0 +1,166 @@
+# contact_import.py
+import csv
+import os
+import re
+
+DEFAULT_COUNTRY_CODE = "+63"
+
+_PHONE_JUNK = re.compile(r"[^\d+]")
+_CSV_NAME_COLUMNS = ("name", "full name", "display name", "fn")
+_CSV_FIRST_COLUMNS = ("first name", "given name")
+_CSV_LAST_COLUMNS = ("last name", "family name", "surname")
+
+
+# -------------------- Phone Numbers --------------------
+def normalize_phone(raw):
+    """Strip formatting from a phone number, keeping a leading '+'."""
+    if not raw:
+        return ""
+    number = _PHONE_JUNK.sub("", raw.strip())
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    # A '+' anywhere but the front is formatting noise
+    number = number[:1] + number[1:].replace("+", "")
+    return number if len(number.lstrip("+")) >= 3 else ""
+
+
+def phone_key(number, default_code=DEFAULT_COUNTRY_CODE):
+    """
+    Dedup key for a phone number: its national digits, so "+63 917 123 4567"
+    and "0917-123-4567" are recognised as the same contact.
+    """
+    number = normalize_phone(number)
+    code = default_code.lstrip("+")
+    if number.startswith("+"):
+        digits = number[1:]
+        if digits.startswith(code):
+            return digits[len(code):]
+        return "+" + digits
+    return number.lstrip("0")
+
+
+# -------------------- vCard --------------------
+def _unfold(lines):
+    """Join RFC 6350 folded lines (continuations start with a space or tab)."""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _vcard_value(line):
+    name, _, value = line.partition(":")
+    return name.upper(), value.replace("\\,", ",").replace("\\;", ";").strip()
+
+
+def iter_vcard(f):
+    """Yield (name, phone) for every card in a .vcf stream."""
+    name = structured = None
+    phones = []
+    for line in _unfold(f):
+        key, value = _vcard_value(line)
+        prop = key.split(";", 1)[0].split(".")[-1]
+        if prop == "BEGIN":
+            name = structured = None
+            phones = []
+        elif prop == "FN":
+            name = value
+        elif prop == "N":
+            parts = [p for p in value.split(";")[:2] if p]
+            structured = " ".join(reversed(parts))
+        elif prop == "TEL":
+            # Mobile numbers go first so they win over landlines
+            if "CELL" in key or "MOBILE" in key:
+                phones.insert(0, value)
+            else:
+                phones.append(value)
+        elif prop == "END":
+            full_name = name or structured
+            if full_name and phones:
+                yield full_name, phones[0]
+
+
+# -------------------- CSV --------------------
+def _pick(header, wanted):
+    for i, col in enumerate(header):
+        if col in wanted:
+            return i
+    return None
+
+
+def iter_csv(f):
+    """Yield (name, phone) rows from a CSV export (Google, Outlook or plain)."""
+    reader = csv.reader(f)
+    try:
+        header = [h.strip().lower() for h in next(reader)]
+    except StopIteration:
+        return
+
+    name_i = _pick(header, _CSV_NAME_COLUMNS)
+    first_i = _pick(header, _CSV_FIRST_COLUMNS)
+    last_i = _pick(header, _CSV_LAST_COLUMNS)
+    # Mobile columns first, then any other phone column in file order
+    phone_cols = [i for i, h in enumerate(header) if "mobile" in h or "cell" in h]
+    phone_cols += [i for i, h in enumerate(header)
+                   if ("phone" in h or h in ("tel", "number")) and i not in phone_cols
+                   and "type" not in h and "label" not in h]
+    if not phone_cols:
+        return
+
+    for row in reader:
+        if name_i is not None and name_i < len(row) and row[name_i].strip():
+            name = row[name_i].strip()
+        else:
+            parts = [row[i].strip() for i in (first_i, last_i) if i is not None and i < len(row)]
+            name = " ".join(p for p in parts if p)
+        phone = next((row[i] for i in phone_cols if i < len(row) and row[i].strip()), "")
+        if name and phone:
+            # Google exports several numbers in one cell separated by ":::"
+            yield name, phone.split(":::")[0]
+
+
+# -------------------- Import --------------------
+def iter_file(path):
+    """Stream (name, phone) pairs from a .vcf or .csv file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".vcf", ".vcard"):
+        parser = iter_vcard
+    elif ext == ".csv":
+        parser = iter_csv
+    else:
+        raise ValueError(f"Unsupported contacts file: {path}")
+
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        yield from parser(f)
+
+
+def import_contacts(path, existing, default_categories=None, default_code=DEFAULT_COUNTRY_CODE):
+    """
+    Parse a contacts export and return (new_contacts, skipped).
+
+    Entries whose number already exists in `existing` (or earlier in the same
+    file) are skipped. Nothing is written; the caller appends the result and
+    saves once.
+    """
+    categories = list(default_categories or [])
+    seen = {phone_key(c.get("phone", ""), default_code) for c in existing}
+    added = []
+    skipped = 0
+
+    for name, raw_phone in iter_file(path):
+        phone = normalize_phone(raw_phone)
+        key = phone_key(phone, default_code) if phone else ""
+        if not key or key in seen:
+            skipped += 1
+            continue
+        seen.add(key)
+        added.append({"name": name, "phone": phone, "categories": list(categories)})
+
+    return added, skipped
@@ -0,0 +1,123 @@
+# contact_search.py
+import re
+
+from contact_import import phone_key, DEFAULT_COUNTRY_CODE
+
+# Prefixes longer than this are not indexed; longer queries narrow the
+# candidates of their first MAX_PREFIX characters instead.
+MAX_PREFIX = 8
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _name_terms(name):
+    return {w for w in _WORD.findall(name.lower())}
+
+
+def _phone_terms(phone):
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    terms = {digits} if digits else set()
+    national = phone_key(phone).lstrip("+")
+    if national:
+        terms.add(national)
+    return terms
+
+
+def _query_tokens(query):
+    """Split a query into name words and a phone digit run."""
+    query = query.strip().lower()
+    digits = "".join(ch for ch in query if ch.isdigit())
+    if digits and not any(ch.isalpha() for ch in query):
+        # "0917 123" or "+63-917" is one phone query, not several words.
+        # Like phone_key, drop the default country code so "+63917" also
+        # finds numbers saved as "0917 ..."
+        code = DEFAULT_COUNTRY_CODE.lstrip("+")
+        if query.startswith("+") and digits.startswith(code) and len(digits) > len(code):
+            return [digits[len(code):]]
+        return [digits.lstrip("0") or digits]
+    return _WORD.findall(query)
+
+
+class ContactIndex:
+    """
+    Prefix index over contact names and phone digits.
+
+    Every name word and phone digit string is indexed under each of its
+    prefixes, so a keystroke is a dict lookup plus a set intersection per
+    query word. Contacts are added/removed individually as they are edited.
+    """
+
+    def __init__(self, contacts=()):
+        self._prefixes = {}
+        self._terms = {}
+        self._contacts = {}
+        self._order = {}
+        self._seq = 0
+        self._last_query = None
+        self._last_ids = None
+        for c in contacts:
+            self.add(c)
+
+    # -------------------- Maintenance --------------------
+    def add(self, contact):
+        cid = id(contact)
+        if cid in self._contacts:
+            self.remove(contact)
+        terms = _name_terms(contact.get("name", "")) | _phone_terms(contact.get("phone", ""))
+        self._contacts[cid] = contact
+        self._terms[cid] = terms
+        self._order[cid] = self._seq
+        self._seq += 1
+        for term in terms:
+            for i in range(1, min(len(term), MAX_PREFIX) + 1):
+                self._prefixes.setdefault(term[:i], set()).add(cid)
+        self._last_query = None
+
+    def remove(self, contact):
+        cid = id(contact)
+        terms = self._terms.pop(cid, None)
+        if terms is None:
+            return
+        del self._contacts[cid]
+        del self._order[cid]
+        for term in terms:
+            for i in range(1, min(len(term), MAX_PREFIX) + 1):
+                bucket = self._prefixes.get(term[:i])
+                if bucket is not None:
+                    bucket.discard(cid)
+                    if not bucket:
+                        del self._prefixes[term[:i]]
+        self._last_query = None
+
+    def replace(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    # -------------------- Search --------------------
+    def _match_token(self, token, candidates):
+        if len(token) <= MAX_PREFIX:
+            ids = self._prefixes.get(token, set())
+            return ids if candidates is None else ids & candidates
+        pool = self._prefixes.get(token[:MAX_PREFIX], set()) if candidates is None else candidates
+        return {cid for cid in pool if any(t.startswith(token) for t in self._terms[cid])}
+
+    def search(self, query):
+        """Return matching contacts in insertion order, or None for an empty query."""
+        tokens = _query_tokens(query)
+        if not tokens:
+            self._last_query = None
+            return None
+
+        key = " ".join(tokens)
+        ids = None
+        if self._last_query is not None and key.startswith(self._last_query):
+            # Typing further only narrows: start from the previous hits
+            ids = self._last_ids
+        for token in tokens:
+            ids = self._match_token(token, ids)
+            if not ids:
+                break
+
+        self._last_query = key
+        self._last_ids = ids
+        return [self._contacts[cid] for cid in sorted(ids, key=self._order.__getitem__)]
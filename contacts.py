@@ -7,11 +7,18 @@ from kivy.uix.checkbox import CheckBox
 from kivy.uix.label import Label
 from kivy.uix.popup import Popup
 from kivy.uix.textinput import TextInput
+from kivy.uix.filechooser import FileChooserListView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.clock import Clock
 import json
 import os
 
-from floating_button import enable_floating, send_sms
-from shake_voice_handler import SOSHandler
+from kivy.app import App
+
+from floating_button import send_sms
+from contact_import import import_contacts
+from contact_search import ContactIndex
+from sos_dispatch import get_dispatcher
 
 DATA_FILE = "contacts.json"
 CATEGORIES = ["THREATS", "ACCIDENTS", "FIRE", "MEDICAL", "ONE TAP EMERGENCY"]
@@ -27,13 +34,62 @@ def load_contacts_file():
     except:
         return []
 
+def save_contacts_file(data):
+    """Write the contacts list in one go, replacing the file atomically."""
+    tmp = DATA_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, DATA_FILE)
+
 contacts = load_contacts_file()
+contact_index = ContactIndex(contacts)
 
 # -------------------- Send SMS --------------------
-def send_sms_to_category(category, message):
-    filtered_contacts = [c for c in contacts if category in c.get("categories", [])]
-    for c in filtered_contacts:
-        send_sms(c["phone"], message)
+def send_sms_to_category(category, message, on_done=None):
+    """Queue `message` for every contact in `category`; returns the DispatchBatch."""
+    numbers = [c["phone"] for c in contacts if category in c.get("categories", [])]
+    return get_dispatcher().submit(numbers, message, on_done=on_done)
+
+# -------------------- Contact Row (RecycleView view) --------------------
+class ContactRow(RecycleDataViewBehavior, BoxLayout):
+    """
+    One recycled row of the contacts list. The widgets are built once and
+    only their text/targets change as the row is reused for other contacts.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(size_hint_y=None, height=60, spacing=5, **kwargs)
+        self.contact = None
+        self.screen = None
+
+        # Contact info label
+        self.info_lbl = Label(color=(1,1,1,1))
+        self.add_widget(self.info_lbl)
+
+        # Edit / Delete / SMS buttons
+        self.edit_btn = Button(text="Edit", size_hint_x=None, width=60, background_color=(1,0,0,1), color=(1,1,1,1))
+        self.edit_btn.bind(on_release=lambda inst: self._dispatch("edit_contact"))
+        self.del_btn = Button(text="Delete", size_hint_x=None, width=60, background_color=(0.5,0,0,1), color=(1,1,1,1))
+        self.del_btn.bind(on_release=lambda inst: self._dispatch("remove_contact"))
+        self.sms_btn = Button(text="SMS", size_hint_x=None, width=60, background_color=(1,0,0,1), color=(1,1,1,1))
+        self.sms_btn.bind(on_release=lambda inst: self._dispatch("send_sms"))
+        self.buttons = (self.edit_btn, self.del_btn, self.sms_btn)
+        for btn in self.buttons:
+            self.add_widget(btn)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.contact = data.get("contact")
+        self.screen = data.get("screen")
+        self.info_lbl.text = data.get("text", "")
+        show_buttons = self.contact is not None
+        for btn in self.buttons:
+            btn.opacity = 1 if show_buttons else 0
+            btn.disabled = not show_buttons
+
+    def _dispatch(self, action):
+        if self.screen is not None and self.contact is not None:
+            getattr(self.screen, action)(self.contact)
+
 
 # -------------------- Contacts Screen --------------------
 class ContactsScreen(Screen):
@@ -43,31 +99,14 @@ class ContactsScreen(Screen):
         self.category_checks = {}
         self.add_form_categories_dict = {}
         self.inputs_visible = False
+        self.filtered_contacts = []
+        self.search_query = ""
+        self._recipients_dirty = True
+        # Checkbox changes within one frame collapse into a single refresh
+        self._refresh_trigger = Clock.create_trigger(self._refresh_contacts)
         self.setup_category_checkboxes()
         self.load_contacts()
 
-        # Initialize SOSHandler for floating button
-        self.sos_handler = SOSHandler(
-            app=self.parent,
-            settings={
-                "shake_enabled": False,
-                "voice_enabled": False,
-                "floating_enabled": True,
-                "countdown_seconds": 5
-            },
-            contacts=[]
-        )
-
-        # Floating button callback
-        def floating_callback():
-            active_cats = [cat for cat, chk in self.category_checks.items() if chk.active]
-            show_all = "ALL" in active_cats
-            filtered_contacts = [c for c in contacts if show_all or any(cat in c["categories"] for cat in active_cats)]
-            self.sos_handler.contacts = filtered_contacts
-            self.sos_handler.on_trigger_detected("Button")
-
-        enable_floating(size=80, callback=floating_callback)
-
     # -------------------- Category Checkboxes --------------------
     def setup_category_checkboxes(self):
         layout = self.ids.cat_layout
@@ -98,42 +137,50 @@ class ContactsScreen(Screen):
     def load_contacts(self):
         self.update_contacts_display()
 
-    def update_contacts_display(self, *args):
-        grid = self.ids.contacts_grid
-        grid.clear_widgets()
-
+    def filter_contacts(self, candidates=None):
+        if candidates is None:
+            candidates = contacts
         active_cats = [cat for cat, chk in self.category_checks.items() if chk.active]
-        show_all = "ALL" in active_cats
+        if "ALL" in active_cats:
+            return list(candidates)
+        active = set(active_cats)
+        return [c for c in candidates if active.intersection(c["categories"])]
+
+    def on_search_text(self, text):
+        # Search only changes what is shown, never who gets alerted
+        self.search_query = text
+        self._refresh_trigger()
+
+    def _update_sos_recipients(self):
+        # The app-wide SOS handler alerts the contacts in the ticked categories
+        handler = getattr(App.get_running_app(), "shake_voice_handler", None)
+        if handler is not None:
+            handler.contacts = self.filter_contacts()
 
-        filtered = [c for c in contacts if show_all or any(cat in c["categories"] for cat in active_cats)]
-        if not filtered:
-            grid.add_widget(Label(text="No contacts to display.", size_hint_y=None, height=30, color=(1,1,1,1)))
+    def update_contacts_display(self, *args):
+        # Categories or the contact list changed. Deferred to the next frame;
+        # repeated calls within a frame coalesce
+        self._recipients_dirty = True
+        self._refresh_trigger()
+
+    def _refresh_contacts(self, *args):
+        # Search narrows through the prefix index; categories filter the hits
+        self.filtered_contacts = self.filter_contacts(contact_index.search(self.search_query))
+        if self._recipients_dirty:
+            self._recipients_dirty = False
+            self._update_sos_recipients()
+        if not self.filtered_contacts:
+            self.ids.contacts_rv.data = [{"contact": None, "screen": None, "text": "No contacts to display."}]
             return
 
-        for c in filtered:
-            cat_text = ", ".join(c["categories"])
-            box = BoxLayout(size_hint_y=None, height=60, spacing=5)
-
-            # Contact info label
-            lbl = Label(text=f"{c['name']} ({c['phone']})\n[{cat_text}]", color=(1,1,1,1))
-            box.add_widget(lbl)
-
-            # Edit button
-            edit_btn = Button(text="Edit", size_hint_x=None, width=60, background_color=(1,0,0,1), color=(1,1,1,1))
-            edit_btn.bind(on_release=lambda inst, contact=c: self.edit_contact(contact))
-            box.add_widget(edit_btn)
-
-            # Delete button
-            del_btn = Button(text="Delete", size_hint_x=None, width=60, background_color=(0.5,0,0,1), color=(1,1,1,1))
-            del_btn.bind(on_release=lambda inst, contact=c: self.remove_contact(contact))
-            box.add_widget(del_btn)
-
-            # SMS button
-            sms_btn = Button(text="SMS", size_hint_x=None, width=60, background_color=(1,0,0,1), color=(1,1,1,1))
-            sms_btn.bind(on_release=lambda inst, contact=c: self.send_sms(contact))
-            box.add_widget(sms_btn)
-
-            grid.add_widget(box)
+        self.ids.contacts_rv.data = [
+            {
+                "contact": c,
+                "screen": self,
+                "text": f"{c['name']} ({c['phone']})\n[{', '.join(c['categories'])}]",
+            }
+            for c in self.filtered_contacts
+        ]
 
     def on_all_checkbox(self, checkbox, value):
         if value:
@@ -153,6 +200,7 @@ class ContactsScreen(Screen):
 
         contact = contacts[self.selected_contact]
         contacts.remove(contact)
+        contact_index.remove(contact)
         self.selected_contact = None
         self.save_contacts()
         self.load_contacts()
@@ -193,10 +241,12 @@ class ContactsScreen(Screen):
         data = {"name": name, "phone": phone, "categories": categories}
 
         if self.selected_contact is not None:
+            contact_index.replace(contacts[self.selected_contact], data)
             contacts[self.selected_contact] = data
             self.selected_contact = None
         else:
             contacts.append(data)
+            contact_index.add(data)
 
         self.save_contacts()
         self.clear_fields()
@@ -224,6 +274,7 @@ class ContactsScreen(Screen):
         global contacts
         if contact in contacts:
             contacts.remove(contact)
+            contact_index.remove(contact)
         self.save_contacts()
         self.load_contacts()
 
@@ -232,11 +283,68 @@ class ContactsScreen(Screen):
         send_sms(contact["phone"], message)
         self.show_popup("SMS Sent", f"Message sent to {contact['name']}")
 
+    # -------------------- Bulk Import --------------------
+    def show_import_popup(self):
+        layout = BoxLayout(orientation="vertical", spacing=5)
+        chooser = FileChooserListView(path=os.getcwd(), filters=["*.vcf", "*.csv"])
+        layout.add_widget(chooser)
+
+        # Categories given to every imported contact
+        cat_grid = GridLayout(cols=2, size_hint_y=None, height=30 * ((len(CATEGORIES) + 1) // 2))
+        cat_checks = {}
+        for cat in CATEGORIES:
+            box = BoxLayout(size_hint_y=None, height=30)
+            chk = CheckBox(active=False)
+            box.add_widget(chk)
+            box.add_widget(Label(text=cat, size_hint_x=None, width=150))
+            cat_grid.add_widget(box)
+            cat_checks[cat] = chk
+        layout.add_widget(cat_grid)
+
+        # Uncategorised contacts would never receive an alert: require a category
+        import_btn = Button(text="Import", size_hint_y=None, height=40, background_color=(1,0,0,1), disabled=True)
+        layout.add_widget(import_btn)
+
+        def on_category(*args):
+            import_btn.disabled = not any(chk.active for chk in cat_checks.values())
+
+        for chk in cat_checks.values():
+            chk.bind(active=on_category)
+        popup = Popup(title="Import Contacts (.vcf / .csv)", content=layout, size_hint=(0.9, 0.9))
+
+        def do_import(*args):
+            if not chooser.selection:
+                return
+            popup.dismiss()
+            categories = [cat for cat, chk in cat_checks.items() if chk.active]
+            self.import_contacts_file(chooser.selection[0], categories)
+
+        import_btn.bind(on_release=do_import)
+        popup.open()
+
+    def import_contacts_file(self, path, categories=None):
+        if not categories:
+            self.show_popup("Error", "Choose at least one category for the imported contacts!")
+            return
+        try:
+            added, skipped = import_contacts(path, contacts, default_categories=categories)
+        except Exception as e:
+            self.show_popup("Error", f"Import failed: {e}")
+            return
+
+        # One write and one list refresh for the whole batch
+        if added:
+            contacts.extend(added)
+            for c in added:
+                contact_index.add(c)
+            self.save_contacts()
+            self.load_contacts()
+        self.show_popup("Import", f"Imported {len(added)} contacts, skipped {skipped}.")
+
     # -------------------- Save / Popup --------------------
     def save_contacts(self):
         try:
-            with open(DATA_FILE, "w") as f:
-                json.dump(contacts, f, indent=4)
+            save_contacts_file(contacts)
         except Exception as e:
             self.show_popup("Error", f"Failed to save contacts: {e}")
 
@@ -1,6 +1,11 @@
 # floating_button.py
 import sys, platform, json, os
 
+from sms_transport import get_transport
+from location_service import get_location_service, follow_up_if_needed
+from sms_compose import compose
+from sos_trace import tracer
+
 IS_ANDROID = platform.system() == "Linux" and "ANDROID_ARGUMENT" in sys.argv
 IS_WINDOWS = platform.system() == "Windows"
 
@@ -42,52 +47,34 @@ def fetch_one_tap_emergency(contacts_list=None):
     return [c for c in contacts_list if "ONE TAP EMERGENCY" in c.get("categories", [])]
 
 def send_sms(number, message):
-    """Send SMS or simulate on PC."""
-    if IS_ANDROID:
-        try:
-            SmsManager = autoclass("android.telephony.SmsManager").getDefault()
-            SmsManager.sendTextMessage(number, None, message, None, None)
-            print(f"[SMS] Sent to {number}")
-        except Exception as e:
-            print(f"[ERROR] Failed to send SMS to {number}: {e}")
-    else:
-        print(f"[SIMULATION] SMS to {number}: {message}")
+    """Send SMS through the active transport (see sms_transport). Returns True if handed off."""
+    return get_transport().send(number, message)
 
 # -------------------- LOCATION --------------------
 def fetch_current_location(callback=None):
-    if IS_ANDROID:
-        try:
-            from plyer import gps
-
-            def on_location(**kwargs):
-                lat = kwargs.get("lat")
-                lon = kwargs.get("lon")
-                if callback:
-                    callback(lat, lon)
-            gps.configure(on_location=on_location)
-            gps.start(minTime=1000, minDistance=1)
-        except Exception as e:
-            print("[GPS] Android error:", e)
-            if callback: callback(None, None)
-    else:
-        try:
-            import geocoder
-            g = geocoder.ip("me")
-            if g.ok and callback:
-                callback(*g.latlng)
-            elif callback:
-                callback(None, None)
-        except:
-            if callback: callback(None, None)
+    """Report the last known fix right away (None, None if there is none yet)."""
+    fix = get_location_service().last_fix()
+    if callback:
+        if fix:
+            callback(fix.lat, fix.lon)
+        else:
+            callback(None, None)
+    return fix
 
 # -------------------- SOS MESSAGE --------------------
 def send_sos_message(contacts_list=None):
     """Send SOS to all one-tap emergency contacts."""
+    from sos_dispatch import get_dispatcher
+
+    numbers = [c["phone"] for c in fetch_one_tap_emergency(contacts_list)]
+
     def send(lat, lon):
-        message = f"SOS! My location: {lat},{lon}" if lat and lon else "SOS! Location unknown."
-        for c in fetch_one_tap_emergency(contacts_list):
-            send_sms(c["phone"], message)
-    fetch_current_location(send)
+        message = compose("one_tap", lat, lon)
+        get_dispatcher().submit(numbers, message)
+
+    fix = fetch_current_location(send)
+    if numbers:
+        follow_up_if_needed(fix, lambda better: send(better.lat, better.lon))
 
 # -------------------- FLOATING BUTTON --------------------
 def enable_floating(size=80, callback=None):
@@ -114,7 +101,7 @@ def enable_floating(size=80, callback=None):
             # Click listener
             class ClickListener(autoclass('android.view.View$OnClickListener')):
                 def onClick(self, v):
-                    if callback: callback()
+                    on_click(callback)
             android_btn.setOnClickListener(ClickListener())
 
             # Drag listener
@@ -193,7 +180,9 @@ def drag_button(instance, touch):
 
 def on_click(callback):
     print("[SOS] Button pressed!")
-    if callback: callback()
+    trace = tracer.start_trace("Button")
+    with trace.root, tracer.activate(trace):
+        if callback: callback()
 
 def set_button_size(size):
     global floating_btn, android_btn
@@ -0,0 +1,263 @@
+# location_service.py
+import math, os, platform, threading, time
+
+try:
+    from plyer import gps
+except ImportError:
+    gps = None
+
+IS_ANDROID = platform.system() == "Linux" and "ANDROID_ARGUMENT" in os.sys.argv
+
+FIX_TTL = 120            # seconds a fix is considered fresh
+REFRESH_INTERVAL = 60    # desktop IP-geolocation refresh period
+IP_ACCURACY = 5000       # metres; IP lookups are city-level at best
+FOLLOW_UP_TIMEOUT = 300  # seconds to wait for a better fix after an SOS
+GOOD_ACCURACY = 100      # metres; fixes at least this good need no follow-up
+EARTH_RADIUS_M = 6371000.0
+
+
+class Fix:
+    """One location reading with its age and accuracy."""
+
+    __slots__ = ("lat", "lon", "accuracy", "source", "timestamp", "monotonic")
+
+    def __init__(self, lat, lon, accuracy=None, source="gps"):
+        self.lat = lat
+        self.lon = lon
+        self.accuracy = accuracy
+        self.source = source
+        self.timestamp = time.time()
+        self.monotonic = time.monotonic()
+
+    @property
+    def age(self):
+        return time.monotonic() - self.monotonic
+
+    def is_fresh(self, ttl=FIX_TTL):
+        return self.age <= ttl
+
+    def better_than(self, other):
+        """
+        Newer and either more accurate, or moved while at least as accurate.
+        Unknown accuracy counts as worse than any known one.
+        """
+        if other is None:
+            return True
+        if self.monotonic <= other.monotonic or self.accuracy is None:
+            return False
+        if other.accuracy is None or self.accuracy < other.accuracy:
+            return True
+        moved = (self.lat, self.lon) != (other.lat, other.lon)
+        return moved and self.accuracy <= other.accuracy
+
+    def is_good(self, ttl=FIX_TTL):
+        return self.is_fresh(ttl) and self.accuracy is not None and self.accuracy <= GOOD_ACCURACY
+
+    def as_dict(self):
+        return {"lat": self.lat, "lon": self.lon, "accuracy": self.accuracy,
+                "source": self.source, "timestamp": self.timestamp}
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres (haversine)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class Subscription:
+    """A subscriber's callback plus its throttling state."""
+
+    __slots__ = ("callback", "min_interval", "min_distance", "last")
+
+    def __init__(self, callback, min_interval=0.0, min_distance=0.0):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.min_distance = min_distance
+        self.last = None
+
+    def wants(self, fix):
+        last = self.last
+        if last is None:
+            return True
+        if fix.monotonic - last.monotonic < self.min_interval:
+            return False
+        if self.min_distance and distance_m(last.lat, last.lon, fix.lat, fix.lon) < self.min_distance:
+            return False
+        return True
+
+
+class LocationService:
+    """
+    Single owner of the GPS session, fanning fixes out to subscribers.
+
+    Nothing else may call gps.configure/start. The session runs while at least
+    one subscriber exists and is configured for the most demanding one
+    (smallest interval and distance); each subscriber is then throttled to its
+    own min_interval/min_distance. On desktop a background thread repeats the
+    IP lookup instead; it ignores those parameters, so subscribers coming and
+    going don't restart it. The last fix is always kept so an SOS never waits.
+    Callbacks run on whatever thread produced the fix.
+    """
+
+    def __init__(self, refresh_interval=REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._fix = None
+        self._lock = threading.RLock()
+        self._subs = []
+        self._session = None     # (min_time_ms, min_distance) of the running session
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------- Subscribers --------------------
+    def subscribe(self, callback, min_interval=0.0, min_distance=0.0):
+        """Receive `callback(fix)` at most every `min_interval` s / `min_distance` m."""
+        return self._add(Subscription(callback, min_interval, min_distance))
+
+    def _add(self, sub):
+        with self._lock:
+            self._subs.append(sub)
+            self._reconfigure()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+                self._reconfigure()
+
+    def _reconfigure(self):
+        if not self._subs:
+            self._stop_session()
+            return
+        wanted = (int(min(s.min_interval for s in self._subs) * 1000),
+                  min(s.min_distance for s in self._subs))
+        if wanted != self._session:
+            if IS_ANDROID and gps:
+                self._stop_session()   # GPS only takes new parameters on a restart
+            self._start_session(*wanted)
+
+    # -------------------- Session --------------------
+    def _start_session(self, min_time, min_distance):
+        self._session = (min_time, min_distance)
+        if IS_ANDROID and gps:
+            try:
+                gps.configure(on_location=self._on_gps_location)
+                gps.start(minTime=max(min_time, 1000), minDistance=min_distance)
+            except Exception as e:
+                print("[GPS] Android error:", e)
+        elif self._thread is None or not self._thread.is_alive():
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._ip_refresh_loop, args=(self._stop,),
+                                            name="location-refresh", daemon=True)
+            self._thread.start()
+
+    def _stop_session(self):
+        if self._session is None:
+            return
+        self._session = None
+        if IS_ANDROID and gps:
+            try:
+                gps.stop()
+            except Exception:
+                pass
+        else:
+            self._stop.set()
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._session is not None
+
+    # -------------------- Sources --------------------
+    def _on_gps_location(self, **kwargs):
+        lat, lon = kwargs.get("lat"), kwargs.get("lon")
+        if lat is not None and lon is not None:
+            self.update(lat, lon, kwargs.get("accuracy"), "gps")
+
+    def _ip_refresh_loop(self, stop):
+        while not stop.is_set():
+            try:
+                import geocoder
+                g = geocoder.ip("me")
+                if g.ok and not stop.is_set():
+                    self.update(g.latlng[0], g.latlng[1], IP_ACCURACY, "ip")
+            except Exception as e:
+                print("[GPS] IP geolocation failed:", e)
+            stop.wait(self.refresh_interval)
+
+    def update(self, lat, lon, accuracy=None, source="gps"):
+        fix = Fix(lat, lon, accuracy, source)
+        with self._lock:
+            self._fix = fix
+            due = [s for s in self._subs if s.wants(fix)]
+            for sub in due:
+                sub.last = fix
+        for sub in due:
+            try:
+                sub.callback(fix)
+            except Exception as e:
+                print("[ERROR] Location subscriber failed:", e)
+
+    # -------------------- Queries --------------------
+    def last_fix(self):
+        """Most recent fix (possibly stale) or None if nothing was ever received."""
+        return self._fix
+
+    def when_better(self, than, callback, timeout=FOLLOW_UP_TIMEOUT):
+        """
+        Call `callback(fix)` once, for the first fix better than `than`. Keeps
+        the session running until then, or until `timeout` seconds pass.
+        Returns a function that cancels the wait.
+        """
+        state = {"done": False}
+        lock = threading.Lock()
+
+        def finish():
+            with lock:
+                if state["done"]:
+                    return False
+                state["done"] = True
+            timer.cancel()
+            self.unsubscribe(state["sub"])
+            return True
+
+        def listener(fix):
+            if fix.better_than(than) and finish():
+                callback(fix)
+
+        state["sub"] = Subscription(listener)
+        timer = threading.Timer(timeout, finish)
+        timer.daemon = True
+        timer.start()
+        self._add(state["sub"])
+        return finish
+
+    def first_fix(self, callback, timeout=FOLLOW_UP_TIMEOUT):
+        """Call `callback(fix)` for the next fix only, then release the session."""
+        self.when_better(None, callback, timeout)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_location_service():
+    """App-wide location service. It only runs while something is subscribed."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = LocationService()
+        return _service
+
+
+def follow_up_if_needed(fix, send):
+    """
+    After an SOS went out with `fix` (possibly None), call `send(better_fix)`
+    once a fresher/more accurate fix arrives. No-op when `fix` was already good.
+    Returns a cancel function, or None when no follow-up is pending.
+    """
+    if fix is not None and fix.is_good():
+        return None
+    return get_location_service().when_better(fix, send)
@@ -15,7 +15,7 @@ from kivy.graphics import Color, Ellipse
 from kivy_garden.mapview import MapView, MapMarkerPopup
 from kivymd.uix.textfield import MDTextField
 from kivymd.app import MDApp
-from plyer import notification, gps
+from plyer import notification
 from kivy.factory import Factory
 from kivy.utils import platform
 import json, os
@@ -35,6 +35,8 @@ from geopy.geocoders import Nominatim
 from contacts import ContactsScreen, send_sms_to_category
 from button_settings import SettingsScreen
 from help import HelpScreen
+from location_service import get_location_service, follow_up_if_needed
+from sms_compose import compose
 from profile import ProfileScreen
 
 MARKERS_FILE = "markers.json"
@@ -327,12 +329,29 @@ class MainScreen(Screen):
         print(f"{self.current_category} SOS cancelled.")
 
     def report_all(self):
-        msg = f"EMERGENCY ({self.current_category})! Location: https://maps.google.com/?q={self.current_lat},{self.current_lon}"
+        fix = get_location_service().last_fix()
+        if fix is not None:
+            self.current_lat, self.current_lon = fix.lat, fix.lon
+        # Without a fix the message says so; the map's default centre is not a position
+        lat, lon = (fix.lat, fix.lon) if fix is not None else (None, None)
+        category = self.current_category
+        msg = compose("report", lat, lon, category=category)
         print(msg)
-        send_sms_to_category(self.current_category, msg)
+        # Returns immediately; delivery is reported once every send has finished
+        batch = send_sms_to_category(category, msg,
+                                     on_done=lambda batch: Clock.schedule_once(lambda dt: self.on_report_delivered(category, batch)))
+        if batch.total:
+            follow_up_if_needed(fix, lambda better: send_sms_to_category(
+                category, compose("update", better.lat, better.lon)))
+
+    def on_report_delivered(self, category, batch):
+        if batch.failed:
+            message = f"Alert delivered to {len(batch.sent)} of {batch.total} contacts."
+        else:
+            message = "Your alert and location have been sent."
         notification.notify(
-            title=f"SOS Sent: {self.current_category}",
-            message="Your alert and location have been sent.",
+            title=f"SOS Sent: {category}",
+            message=message,
             timeout=5
         )
 
@@ -405,17 +424,14 @@ class MapEditorScreen(Screen):
         self.current_lat = 14.5995
         self.current_lon = 120.9842
 
-        # Try to get current GPS location (mobile only)
-        if platform in ("android", "ios"):
-            try:
-                gps.configure(on_location=self.on_gps_location)
-                gps.start(minTime=1000, minDistance=0)
-            except NotImplementedError:
-                print("GPS not implemented; using fallback coordinates.")
-                self.center_map_on_current()
-        else:
-            # On PC / unsupported platforms, just center on fallback
-            self.center_map_on_current()
+        # Center on the last known fix (or the fallback) now, then on the
+        # next fix from the shared location service, which owns the GPS session
+        service = get_location_service()
+        fix = service.last_fix()
+        if fix is not None:
+            self.current_lat, self.current_lon = fix.lat, fix.lon
+        self.center_map_on_current()
+        service.first_fix(lambda fix: Clock.schedule_once(lambda dt: self.on_gps_location(lat=fix.lat, lon=fix.lon)))
 
         # Reload markers after map is ready
         Clock.schedule_once(lambda dt: self.reload_markers(), 0.1)
@@ -425,10 +441,6 @@ class MapEditorScreen(Screen):
         self.current_lat = kwargs.get("lat", self.current_lat)
         self.current_lon = kwargs.get("lon", self.current_lon)
         self.center_map_on_current()
-        try:
-            gps.stop()
-        except Exception:
-            pass
 
     # ---------------- Center Map ----------------
     def center_map_on_current(self):
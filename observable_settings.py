@@ -1,15 +1,37 @@
-from kivy.properties import BooleanProperty, NumericProperty, StringProperty
+import json, os, threading
+
+from kivy.clock import Clock
+from kivy.properties import BooleanProperty, DictProperty, NumericProperty, StringProperty
 from kivy.event import EventDispatcher
 
+SETTINGS_FILE = "settings.json"
+LEGACY_PHRASE_FILE = "phrase.json"   # older versions stored only the voice phrase
+SAVE_DELAY = 1.0                     # seconds; changes within it share one write
+
+
 class ObservableSettings(EventDispatcher):
+    """
+    App settings as Kivy properties, persisted to a JSON file.
+
+    Observers registered with observe() are called once per frame with a
+    dict of every key that changed during that frame. Changes are written
+    atomically (tmp file + os.replace) at most once per SAVE_DELAY;
+    flush() writes anything pending immediately.
+    """
+
     # Shake
     shake_enabled = BooleanProperty(False)
     shake_sensitivity = NumericProperty(5)
+    shake_sample_rate = NumericProperty(50)   # Hz
 
     # Voice
     voice_enabled = BooleanProperty(False)
-    voice_phrase = StringProperty("help me")
+    voice_phrase = StringProperty("help me")        # comma-separated phrases
+    voice_language = StringProperty("en")
+    voice_phrases = DictProperty({})                # extra phrases per language, e.g. {"en": ["call 911"]}
     voice_sensitivity = NumericProperty(5)
+    audio_evidence = BooleanProperty(True)           # save audio around each SOS while listening
+    voice_keyword_spotting = BooleanProperty(True)   # decode only the phrase(s) + [unk]
 
     # Floating button
     floating_enabled = BooleanProperty(True)
@@ -21,3 +43,109 @@ class ObservableSettings(EventDispatcher):
     # Countdown
     countdown_enabled = BooleanProperty(True)
     countdown_seconds = NumericProperty(5)
+
+    def __init__(self, path=SETTINGS_FILE, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._observers = []
+        self._changed = {}
+        self._dirty = False
+        self._write_lock = threading.Lock()
+        self._notify_trigger = Clock.create_trigger(self._notify)
+        self._save_trigger = Clock.create_trigger(self._save_pending, SAVE_DELAY)
+        self.load()
+        for key in self.keys():
+            self.fbind(key, self._on_property, key)
+
+    # -------------------- Access --------------------
+    def keys(self):
+        return list(self.properties())
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def update(self, values):
+        known = self.properties()
+        for key, value in values.items():
+            if key in known:
+                setattr(self, key, value)
+
+    # -------------------- Observers --------------------
+    def observe(self, callback):
+        """Call `callback(changes)` once per frame in which settings changed."""
+        self._observers.append(callback)
+
+    def unobserve(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    def _on_property(self, key, instance, value):
+        self._changed[key] = value
+        self._dirty = True
+        self._notify_trigger()
+        self._save_trigger()
+
+    def _notify(self, *args):
+        changes, self._changed = self._changed, {}
+        for callback in list(self._observers):
+            try:
+                callback(changes)
+            except Exception as e:
+                print("[ERROR] Settings observer failed:", e)
+
+    # -------------------- Persistence --------------------
+    def load(self):
+        values = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    values = json.load(f)
+            except Exception as e:
+                print("[ERROR] Failed to load settings:", e)
+        elif os.path.exists(LEGACY_PHRASE_FILE):
+            try:
+                with open(LEGACY_PHRASE_FILE, "r") as f:
+                    values = {"voice_phrase": json.load(f).get("voice_phrase", self.voice_phrase)}
+            except Exception:
+                pass
+
+        known = self.properties()
+        for key, value in values.items():
+            if key in known:
+                try:
+                    setattr(self, key, value)
+                except ValueError as e:
+                    print(f"[WARNING] Ignoring invalid setting {key}: {e}")
+
+    def _save_pending(self, *args):
+        if self._dirty:
+            self.save()
+
+    def save(self):
+        self._dirty = False
+        data = self.as_dict()
+        tmp = self.path + ".tmp"
+        try:
+            with self._write_lock:
+                with open(tmp, "w") as f:
+                    json.dump(data, f, indent=4)
+                os.replace(tmp, self.path)
+        except Exception as e:
+            self._dirty = True
+            print("[ERROR] Failed to save settings:", e)
+
+    def flush(self):
+        """Write pending changes now (e.g. from App.on_stop)."""
+        self._save_trigger.cancel()
+        self._save_pending()
+
+
+_settings = None
+
+
+def get_settings():
+    """App-wide settings store, loaded on first use."""
+    global _settings
+    if _settings is None:
+        _settings = ObservableSettings()
+    return _settings
@@ -0,0 +1,128 @@
+# phrase_matcher.py
+"""
+Activation phrase matching over recognizer transcripts.
+
+Phrases are stored in a token trie, so a transcript is scanned once per start
+position regardless of how many phrases exist. Each trie node also indexes
+its child words by their one-deletion variants; a transcript word can then
+follow a child that is one inserted or dropped letter away ("tulongg",
+"saklolo" heard as "saklol") with a few dict lookups instead of comparing
+against every child. Both words need MIN_FUZZY_LEN or more letters and
+substitutions never match: a false trigger sends SMS, and short words one
+letter apart ("held", "kelp" for "help") are different words.
+
+Vosk repeats the same partial transcript many times while a phrase is being
+spoken; feed() ignores a transcript identical to the previous one, and each
+phrase has a cooldown so one utterance triggers it once.
+"""
+import time
+
+COOLDOWN_SECONDS = 5.0
+MIN_FUZZY_LEN = 5      # shorter words must match exactly
+
+
+def _deletions(word):
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _one_indel(a, b):
+    """True if `a` and `b` differ by exactly one inserted or deleted letter."""
+    la, lb = len(a), len(b)
+    if abs(la - lb) != 1:
+        return False
+    if la > lb:
+        a, b, la = b, a, lb
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class _Node:
+    __slots__ = ("children", "fuzzy", "phrase")
+
+    def __init__(self):
+        self.children = {}
+        self.fuzzy = {}      # deletion variant -> child words it can come from
+        self.phrase = None   # set on the node that ends a phrase
+
+    def child(self, word):
+        node = self.children.get(word)
+        if node is None:
+            node = self.children[word] = _Node()
+            if len(word) >= MIN_FUZZY_LEN:
+                for variant in _deletions(word):
+                    self.fuzzy.setdefault(variant, set()).add(word)
+        return node
+
+    def step(self, word, fuzzy):
+        node = self.children.get(word)
+        if node is not None or not fuzzy or len(word) < MIN_FUZZY_LEN:
+            return node
+        seen = set()
+        for variant in _deletions(word):
+            for candidate in self.fuzzy.get(variant, ()):
+                if candidate not in seen:
+                    seen.add(candidate)
+                    if _one_indel(word, candidate):
+                        return self.children[candidate]
+        return None
+
+
+class PhraseMatcher:
+    def __init__(self, phrases=(), fuzzy=True, cooldown=COOLDOWN_SECONDS):
+        self.fuzzy = fuzzy
+        self.cooldown = cooldown
+        self._root = _Node()
+        self.phrases = []
+        self._last_text = None
+        self._last_fired = {}
+        for phrase in phrases:
+            self.add(phrase)
+
+    def add(self, phrase):
+        words = phrase.lower().split()
+        if not words:
+            return
+        node = self._root
+        for word in words:
+            node = node.child(word)
+        if node.phrase is None:
+            node.phrase = " ".join(words)
+            self.phrases.append(node.phrase)
+
+    def find(self, text):
+        """All phrases occurring in `text` as whole-word sequences, in order of appearance."""
+        words = text.lower().split()
+        found = []
+        for start in range(len(words)):
+            node = self._root
+            for word in words[start:]:
+                node = node.step(word, self.fuzzy)
+                if node is None:
+                    break
+                if node.phrase is not None and node.phrase not in found:
+                    found.append(node.phrase)
+        return found
+
+    def feed(self, text, now=None):
+        """
+        Match a (partial or final) transcript. Returns the phrases that should
+        fire now: repeats of the previous transcript and phrases still in
+        their cooldown are skipped.
+        """
+        if text == self._last_text:
+            return []
+        self._last_text = text
+        now = time.monotonic() if now is None else now
+        fired = []
+        for phrase in self.find(text):
+            last = self._last_fired.get(phrase)
+            if last is None or now - last >= self.cooldown:
+                self._last_fired[phrase] = now
+                fired.append(phrase)
+        return fired
+
+    def end_utterance(self):
+        """Forget the last transcript (e.g. after a final result)."""
+        self._last_text = None
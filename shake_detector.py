@@ -0,0 +1,209 @@
+# shake_detector.py
+"""
+Shake detection on a dedicated sampling thread.
+
+AccelerometerSampler reads the sensor at SAMPLE_RATE Hz off the UI thread
+and feeds ShakeDetector, which keeps the last few seconds in a ring buffer.
+For every sample the detector takes the jerk over LAG_SECONDS (the change in
+acceleration, the quantity the old 10 Hz poll compared) and triggers when its
+RMS over the last WINDOW_SECONDS exceeds the threshold. The UI is only
+called back on a trigger.
+
+While the phone lies still the sampler drops to IDLE_RATE. Each idle sample
+also stands in for the full-rate samples skipped since the previous one, so
+the ring buffer stays time-aligned. The first idle sample whose jerk exceeds
+IDLE_ENERGY (far below any shake threshold) switches straight back to full
+rate; because the gap before it is filled with that sample, the jerk window
+sees the motion as if it had been sampled at full rate all along.
+
+NumPy is used for the ring buffer when installed; otherwise a plain list
+ring with the same behaviour is used.
+"""
+import math, threading, time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 50          # Hz
+LAG_SECONDS = 0.1         # jerk is measured across this interval
+WINDOW_SECONDS = 0.2      # RMS window; about two of the old 10 Hz samples
+BUFFER_SECONDS = 2.0      # ring buffer length
+COOLDOWN_SECONDS = 3.0    # ignore further shaking after a trigger
+IDLE_RATE = 4             # Hz while still (the old poll woke at 10); None disables adaptive sampling
+IDLE_ENERGY = 0.5         # RMS jerk below which the phone counts as still
+IDLE_AFTER_SECONDS = 2.0  # stillness needed before dropping to IDLE_RATE
+
+
+def shake_threshold_for(sensitivity):
+    """Jerk threshold (m/s^2 per LAG_SECONDS) for a 1-10 sensitivity setting."""
+    return max(2.0, 15.0 - sensitivity * 1.2)
+
+
+class ShakeDetector:
+    """Windowed jerk-energy detector over a fixed-size ring buffer of (x, y, z) samples."""
+
+    def __init__(self, threshold, rate=SAMPLE_RATE, lag=LAG_SECONDS, window=WINDOW_SECONDS,
+                 cooldown=COOLDOWN_SECONDS, buffer_seconds=BUFFER_SECONDS):
+        self.threshold = threshold
+        self.rate = rate
+        self.cooldown = cooldown
+        self.lag = max(1, int(round(lag * rate)))
+        self.window = max(1, int(round(window * rate)))
+        self.capacity = max(self.lag + self.window, int(round(buffer_seconds * rate)))
+        if np is not None:
+            self._buf = np.zeros((self.capacity, 3), dtype=np.float64)
+            self._offsets = np.arange(-self.window, 0)
+        else:
+            self._buf = [(0.0, 0.0, 0.0)] * self.capacity
+        self.energy = 0.0         # RMS jerk of the latest window
+        self.reset()
+
+    def reset(self):
+        self._count = 0
+        self._last_trigger = None
+        self.energy = 0.0
+
+    def hold(self, x, y, z, n):
+        """Append `n` copies of a sample without evaluating (idle-rate gaps)."""
+        for _ in range(min(n, self.capacity)):
+            self._buf[self._count % self.capacity] = (x, y, z)
+            self._count += 1
+
+    def add(self, t, x, y, z):
+        """Append one sample taken at monotonic time `t`. Returns True on a trigger."""
+        self._buf[self._count % self.capacity] = (x, y, z)
+        self._count += 1
+        if self._count <= self.lag + self.window - 1:
+            return False
+
+        self.energy = self._jerk_rms()
+        if self._last_trigger is not None and t - self._last_trigger < self.cooldown:
+            return False
+        if self.energy > self.threshold:
+            self._last_trigger = t
+            return True
+        return False
+
+    def _jerk_rms(self):
+        cap, lag = self.capacity, self.lag
+        if np is not None:
+            idx = (self._count + self._offsets) % cap
+            d = self._buf[idx] - self._buf[(idx - lag) % cap]
+            return float(np.sqrt(np.einsum("ij,ij->i", d, d).mean()))
+
+        total = 0.0
+        for i in range(self._count - self.window, self._count):
+            ax, ay, az = self._buf[i % cap]
+            bx, by, bz = self._buf[(i - lag) % cap]
+            total += (ax - bx) ** 2 + (ay - by) ** 2 + (az - bz) ** 2
+        return math.sqrt(total / self.window)
+
+
+class AccelerometerSampler:
+    """
+    Polls `read()` (returning (x, y, z) or None) on its own thread and calls
+    `on_shake(t, energy)` from that thread when the detector triggers.
+
+    Counters (see stats()) show how often the thread woke up at each rate.
+    """
+
+    def __init__(self, read, on_shake, detector, rate=SAMPLE_RATE, idle_rate=IDLE_RATE,
+                 idle_energy=IDLE_ENERGY, idle_after=IDLE_AFTER_SECONDS):
+        self.read = read
+        self.on_shake = on_shake
+        self.detector = detector
+        self.rate = rate
+        self.idle_rate = idle_rate
+        self.idle_energy = idle_energy
+        self.idle_after = idle_after
+        self.idle = False
+        # Counters
+        self.samples = 0
+        self.wakeups = 0
+        self.idle_wakeups = 0
+        self.ramp_ups = 0
+        self.started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        return {"wakeups": self.wakeups, "idle_wakeups": self.idle_wakeups,
+                "samples": self.samples, "ramp_ups": self.ramp_ups, "idle": self.idle,
+                "seconds": elapsed,
+                "wakeups_per_second": self.wakeups / elapsed if elapsed > 0 else 0.0}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.detector.reset()
+        self.idle = False
+        self.started = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, args=(self._stop,),
+                                        name="shake-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _loop(self, stop):
+        next_at = time.monotonic()
+        last = last_t = None
+        quiet_since = None
+        while not stop.is_set():
+            t = time.monotonic()
+            self.wakeups += 1
+            if self.idle:
+                self.idle_wakeups += 1
+            try:
+                val = self.read()
+            except Exception as e:
+                print("[ERROR] Shake error:", e)
+                val = None
+            if val and not any(v is None for v in val[:3]):
+                sample = tuple(val[:3])
+                self.samples += 1
+                if self.idle:
+                    # Stand in for the full-rate samples skipped since the last wakeup
+                    skipped = int(round((t - last_t) * self.rate)) - 1
+                    if skipped > 0:
+                        self.detector.hold(*sample, skipped)
+                    if _jerk(sample, last) > self.idle_energy:
+                        self.idle = False
+                        self.ramp_ups += 1
+                        quiet_since = None
+                    else:
+                        self.detector.hold(*sample, 1)
+                if not self.idle:
+                    if self.detector.add(t, *sample):
+                        self.on_shake(t, self.detector.energy)
+                    if self.idle_rate:
+                        if self.detector.energy >= self.idle_energy:
+                            quiet_since = None
+                        elif quiet_since is None:
+                            quiet_since = t
+                        elif t - quiet_since >= self.idle_after:
+                            self.idle = True
+                last, last_t = sample, t
+
+            # Fixed-rate schedule; skip missed slots instead of bursting
+            next_at += 1.0 / (self.idle_rate if self.idle else self.rate)
+            delay = next_at - time.monotonic()
+            if delay < 0:
+                next_at = time.monotonic()
+                delay = 0
+            stop.wait(delay)
+
+
+def _jerk(a, b):
+    return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2)
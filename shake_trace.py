@@ -0,0 +1,121 @@
+# shake_trace.py
+"""
+Compact binary recordings of raw accelerometer streams, for tuning the shake
+detector off-device (see bench_shake.py).
+
+File layout: a header (magic, nominal sample rate) followed by one record per
+sample: seconds since the start as float32 and x, y, z as int16 hundredths of
+m/s^2 (+-327 m/s^2), 10 bytes per sample or about 1.8 MB per hour at 50 Hz.
+Labelled shake intervals, the ground truth for replay, go in a JSON file
+next to the recording (<path>.labels.json).
+"""
+import json, os, struct, threading, time
+
+MAGIC = b"SHK1"
+HEADER = struct.Struct("<4sf")
+RECORD = struct.Struct("<f3h")
+SCALE = 100.0
+_LIMIT = 32767
+
+
+def labels_path(path):
+    return path + ".labels.json"
+
+
+def _quantize(v):
+    return max(-_LIMIT, min(_LIMIT, int(round(v * SCALE))))
+
+
+class TraceRecorder:
+    """
+    Appends samples to a recording. wrap(read) returns a read function that
+    records every sample it returns, so it can be handed to
+    AccelerometerSampler unchanged.
+    """
+
+    def __init__(self, path, rate):
+        self.path = path
+        self.rate = rate
+        self.labels = []
+        self.samples = 0
+        self._open_label = None
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, rate))
+        self._start = time.monotonic()
+
+    def now(self):
+        return time.monotonic() - self._start
+
+    def record(self, x, y, z, t=None):
+        t = self.now() if t is None else t
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(RECORD.pack(t, _quantize(x), _quantize(y), _quantize(z)))
+            self.samples += 1
+
+    def wrap(self, read):
+        def recording_read():
+            val = read()
+            if val and not any(v is None for v in val[:3]):
+                self.record(*val[:3])
+            return val
+        return recording_read
+
+    # -------------------- Ground Truth --------------------
+    def label(self, start, end, name="shake"):
+        self.labels.append({"start": start, "end": end, "label": name})
+
+    def begin_label(self, name="shake"):
+        self._open_label = (self.now(), name)
+
+    def end_label(self):
+        if self._open_label is not None:
+            start, name = self._open_label
+            self._open_label = None
+            self.label(start, self.now(), name)
+
+    def close(self):
+        self.end_label()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        if self.labels:
+            with open(labels_path(self.path), "w") as f:
+                json.dump(self.labels, f, indent=2)
+
+
+def write_trace(path, samples, rate, labels=()):
+    """Write `samples` [(t, x, y, z), ...] and optional label dicts in one go."""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, rate))
+        f.write(b"".join(RECORD.pack(t, _quantize(x), _quantize(y), _quantize(z))
+                         for t, x, y, z in samples))
+    if labels:
+        with open(labels_path(path), "w") as f:
+            json.dump(list(labels), f, indent=2)
+
+
+def read_trace(path):
+    """Return (rate, [(t, x, y, z), ...])."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, rate = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a shake trace")
+    body = memoryview(data)[HEADER.size:]
+    body = body[:len(body) - len(body) % RECORD.size]   # drop a torn last record
+    samples = [(t, x / SCALE, y / SCALE, z / SCALE) for t, x, y, z in RECORD.iter_unpack(body)]
+    return rate, samples
+
+
+def read_labels(path):
+    """Labelled intervals [(start, end), ...] for a recording; empty if unlabelled."""
+    lp = labels_path(path)
+    if not os.path.exists(lp):
+        return []
+    with open(lp, "r") as f:
+        return [(l["start"], l["end"]) for l in json.load(f) if l.get("label", "shake") == "shake"]
@@ -1,4 +1,4 @@
-import os, json, math, platform, threading, queue
+import os, json, platform, threading, queue, time
 from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.popup import Popup
@@ -7,42 +7,81 @@ from kivy.uix.button import Button
 
 # Optional modules for mobile/desktop
 try:
-    from plyer import gps, notification, accelerometer, microphone
+    from plyer import notification, accelerometer, microphone
 except ImportError:
-    gps = notification = accelerometer = microphone = None
+    notification = accelerometer = microphone = None
 
-# Vosk for desktop
+# Audio input for desktop
 try:
     import pyaudio
-    from vosk import Model, KaldiRecognizer
 except ImportError:
-    pyaudio = Model = KaldiRecognizer = None
-
-from floating_button import enable_floating, disable_floating, send_sos_message
+    pyaudio = None
+
+from floating_button import enable_floating, disable_floating, set_button_size
+from sos_dispatch import get_dispatcher
+from location_service import get_location_service, follow_up_if_needed
+from sms_compose import compose
+from sos_trace import tracer
+from shake_detector import AccelerometerSampler, ShakeDetector, shake_threshold_for, SAMPLE_RATE
+from shake_trace import TraceRecorder
+from voice_vad import VoiceActivityGate
+from voice_model import get_model_cache, make_recognizer, model_path_for, MODEL_PATH, DEFAULT_LANGUAGE
+from phrase_matcher import PhraseMatcher
+from audio_evidence import EvidenceRecorder
 
 VOICE_PHRASE_FILE = os.path.join(os.getcwd(), "phrase.json")
 DEFAULT_PHRASE = "help me"
 IS_ANDROID = platform.system() == "Linux" and "ANDROID_ARGUMENT" in os.sys.argv
+# Keeps the last-known fix warm for instant SOS without running GPS flat out
+SOS_GPS_INTERVAL = 10
+SOS_GPS_DISTANCE = 20
+# Triggers whose alert text is rendered ahead of time for immediate mode
+TRIGGERS = ("Shake", "Voice", "Button")
+UNDO_SECONDS = 30
+SHAKE_TRACE_FILE = os.path.join(os.getcwd(), "shake_trace.shk")
+# Microphone chunks buffered for the recognizer; the oldest is dropped when full
+AUDIO_QUEUE_CHUNKS = 64
+UNKNOWN_WORD = "[unk]"
+# Settings each subsystem is (re)started for; anything else is read live
+SUBSYSTEM_KEYS = {
+    "shake": ("shake_enabled", "shake_sample_rate"),
+    "voice": ("voice_enabled", "voice_language"),
+    "floating": ("floating_enabled", "button_size"),
+}
 
 
 class SOSHandler:
     """
     Handles SOS triggers: shake, voice, floating button.
     Sends SOS messages with countdown and location support.
+
+    With countdown_enabled off, a trigger sends straight away from the
+    pre-resolved recipient numbers and pre-rendered alert text, and offers
+    an "undo" that sends an all-clear instead of a pre-send countdown.
+
+    The app keeps a single instance (SOSApp.shake_voice_handler); screens
+    update its settings and recipients rather than creating their own.
+    With autostart=False nothing is started until apply_settings().
     """
 
-    def __init__(self, app=None, settings=None, contacts=None):
+    def __init__(self, app=None, settings=None, contacts=None, autostart=True):
         self.app = app
         self.settings = settings or {
             "shake_enabled": False,
             "voice_enabled": False,
             "floating_enabled": False,
+            "countdown_enabled": True,
             "countdown_seconds": 5,
             "shake_sensitivity": 5,
             "button_size": 80
         }
 
-        # Contacts
+        # Contacts (resolved to phone numbers whenever they are assigned)
+        self._recipients = []
+        self._prerendered = {}
+        self._last_alert = None
+        self._sent_at = {}           # trigger -> monotonic time of its immediate send
+        self.undo_popup = None
         if contacts is None:
             self.contacts = []
         elif isinstance(contacts, (list, tuple)):
@@ -52,33 +91,61 @@ class SOSHandler:
             self.contacts = []
 
         # Shake variables
-        self.last_x = self.last_y = self.last_z = None
-        self.shake_threshold = 10
-        self._shake_count = 0
-        self._required_consecutive = 2
-        self._shake_event = None
+        self.shake_threshold = shake_threshold_for(self.settings.get("shake_sensitivity", 5))
+        self._shake_sampler = None
+        self._shake_recorder = None
 
         # Voice recognition variables
         self.is_listening = False
         self.vosk_initialized = False
         self.voice_model = None
+        self._model_path = None      # model held in the shared cache
         self.recognizer = None
         self.audio_stream = None
         self._voice_thread = None
-        self._voice_event = None
-        self._voice_queue = queue.Queue()
-        self.voice_phrase = self.load_voice_phrase()
+        self._audio_queue = queue.Queue(maxsize=AUDIO_QUEUE_CHUNKS)
+        self._voice_stop = threading.Event()
+        self.dropped_audio_chunks = 0
+        self._vad = None
+        self._evidence = None        # pre-trigger audio, allocated once voice starts
+        self._voice_clock = time.monotonic   # bench_voice swaps in the replayed audio's clock
+        self.voice_phrase = (self.settings.get("voice_phrase") or self.load_voice_phrase()).lower()
+        self.voice_phrases = self._active_phrases()
+        self._matcher = PhraseMatcher(self.voice_phrases)
 
         # GPS / Location
         self.current_location = {"lat": None, "lon": None}
+        self._location_sub = None
         self.start_gps()
 
         # Countdown
         self.countdown_popup = None
         self._countdown_event = None
+        self._countdown_trace = None
+        self._countdown_span = None
         self._remaining_seconds = 0
 
-        self.apply_settings()
+        if autostart:
+            self.apply_settings()
+
+    # -------------------- Recipients --------------------
+    @property
+    def contacts(self):
+        return self._contacts
+
+    @contacts.setter
+    def contacts(self, contacts):
+        if not isinstance(contacts, (list, tuple)):
+            print("[WARNING] contacts is not iterable. Skipping SMS sending.")
+            contacts = []
+        self._contacts = contacts
+        numbers = []
+        for contact in contacts:
+            if isinstance(contact, dict) and contact.get("phone"):
+                numbers.append(contact["phone"])
+            else:
+                print(f"[WARNING] Invalid contact skipped: {contact}")
+        self._recipients = numbers
 
     # -------------------- Voice Phrase --------------------
     def load_voice_phrase(self):
@@ -90,37 +157,54 @@ class SOSHandler:
                 return DEFAULT_PHRASE
         return DEFAULT_PHRASE
 
-    def save_voice_phrase(self, phrase):
-        self.voice_phrase = phrase.lower()
-        try:
-            with open(VOICE_PHRASE_FILE, "w") as f:
-                json.dump({"voice_phrase": self.voice_phrase}, f)
-        except Exception as e:
-            print("[ERROR] Failed to save voice phrase:", e)
+    def _active_phrases(self):
+        """
+        Activation phrases for the current language: the comma-separated
+        voice_phrase plus any listed under voice_phrases[language].
+        """
+        language = self.settings.get("voice_language", DEFAULT_LANGUAGE)
+        candidates = self.voice_phrase.split(",") + list(self.settings.get("voice_phrases", {}).get(language, []))
+        phrases = []
+        for phrase in candidates:
+            phrase = " ".join(phrase.lower().split())
+            if phrase and phrase not in phrases:
+                phrases.append(phrase)
+        return phrases
 
     # -------------------- GPS / Location --------------------
     def start_gps(self):
-        if IS_ANDROID and gps:
-            try:
-                gps.configure(on_location=self.on_location_update)
-                gps.start(minTime=1000, minDistance=0)
-            except Exception as e:
-                print("[GPS] Android error:", e)
-                self.current_location = {"lat": 14.5995, "lon": 120.9842}
+        # The shared service refreshes in the background; never block here
+        service = get_location_service()
+        if self._location_sub is None:
+            self._location_sub = service.subscribe(self.on_location_update,
+                                                   min_interval=SOS_GPS_INTERVAL,
+                                                   min_distance=SOS_GPS_DISTANCE)
+        fix = service.last_fix()
+        if fix is not None:
+            self.on_location_update(fix)
         else:
-            try:
-                import geocoder
-                g = geocoder.ip("me")
-                if g.ok:
-                    self.current_location = {"lat": g.latlng[0], "lon": g.latlng[1]}
-                else:
-                    self.current_location = {"lat": 14.5995, "lon": 120.9842}
-            except Exception:
-                self.current_location = {"lat": 14.5995, "lon": 120.9842}
+            self._prerender(None)
+
+    def stop_gps(self):
+        if self._location_sub is not None:
+            get_location_service().unsubscribe(self._location_sub)
+            self._location_sub = None
+
+    def on_location_update(self, fix):
+        self.current_location["lat"] = fix.lat
+        self.current_location["lon"] = fix.lon
+        self._prerender(fix)
+
+    def _prerender(self, fix):
+        lat, lon = (fix.lat, fix.lon) if fix else (None, None)
+        self._prerendered = {t: (fix, compose("alert", lat, lon, trigger=t)) for t in TRIGGERS}
 
-    def on_location_update(self, **kwargs):
-        self.current_location["lat"] = kwargs.get("lat")
-        self.current_location["lon"] = kwargs.get("lon")
+    def _alert_message(self, trigger, fix):
+        cached = self._prerendered.get(trigger)
+        if cached is not None and cached[0] is fix:
+            return cached[1]
+        lat, lon = (fix.lat, fix.lon) if fix else (None, None)
+        return compose("alert", lat, lon, trigger=trigger)
 
     # -------------------- Shake Detection --------------------
     def start_shake_monitoring(self):
@@ -132,50 +216,88 @@ class SOSHandler:
         except Exception:
             print("[DEBUG] Accelerometer could not be enabled.")
             return
-        self._shake_count = 0
-        self.last_x = self.last_y = self.last_z = None
-        if self._shake_event:
-            self._shake_event.cancel()
-        self._shake_event = Clock.schedule_interval(self.check_shake, 0.1)
-
-    def check_shake(self, dt):
-        try:
-            val = accelerometer.acceleration
-            if not val or any(v is None for v in val[:3]):
-                return
-            x, y, z = val[:3]
-            if self.last_x is None:
-                self.last_x, self.last_y, self.last_z = x, y, z
-                return
-            dx, dy, dz = x - self.last_x, y - self.last_y, z - self.last_z
-            magnitude = math.sqrt(dx**2 + dy**2 + dz**2)
-            if magnitude > self.shake_threshold:
-                self._shake_count += 1
-                if self._shake_count >= self._required_consecutive:
-                    self.on_trigger_detected("Shake")
-                    self._shake_count = 0
-            else:
-                self._shake_count = 0
-            self.last_x, self.last_y, self.last_z = x, y, z
-        except Exception as e:
-            print("[ERROR] Shake error:", e)
+        self.stop_shake_monitoring(disable=False)
+
+        # Sampling and detection run on their own thread; the UI thread is
+        # only scheduled when a shake is detected
+        rate = self.settings.get("shake_sample_rate", SAMPLE_RATE)
+        detector = ShakeDetector(self.shake_threshold, rate=rate)
+        read = lambda: accelerometer.acceleration
+        if self._shake_recorder is not None:
+            read = self._shake_recorder.wrap(read)
+        self._shake_sampler = AccelerometerSampler(read, self._on_shake_sampled, detector, rate=rate)
+        self._shake_sampler.start()
+
+    def _on_shake_sampled(self, sampled_at, energy):
+        # Sampler thread
+        Clock.schedule_once(lambda dt: self.check_shake(sampled_at, energy))
+
+    def check_shake(self, sampled_at, energy):
+        trace = tracer.start_trace("Shake", start=sampled_at, magnitude=round(energy, 2))
+        with trace.root, tracer.activate(trace):
+            self.on_trigger_detected("Shake")
+
+    def start_shake_recording(self, path=SHAKE_TRACE_FILE):
+        """Record the raw accelerometer stream for bench_shake.py. Returns the TraceRecorder."""
+        self.stop_shake_recording()
+        self._shake_recorder = TraceRecorder(path, self.settings.get("shake_sample_rate", SAMPLE_RATE))
+        if self._shake_sampler is not None:
+            self.start_shake_monitoring()
+        return self._shake_recorder
 
-    def stop_shake_monitoring(self):
-        if self._shake_event:
-            try:
-                self._shake_event.cancel()
-            except Exception:
-                pass
+    def stop_shake_recording(self):
+        recorder, self._shake_recorder = self._shake_recorder, None
+        if recorder is None:
+            return
+        if self._shake_sampler is not None:
+            self.start_shake_monitoring()
+        recorder.close()
+        print(f"[DEBUG] Recorded {recorder.samples} accelerometer samples to {recorder.path}")
+
+    def shake_stats(self):
+        """Sampler wakeup counters (see AccelerometerSampler.stats), or None when not running."""
+        return self._shake_sampler.stats() if self._shake_sampler is not None else None
+
+    def stop_shake_monitoring(self, disable=True):
+        if self._shake_sampler is not None:
+            self._shake_sampler.stop()
+            self._shake_sampler = None
+            if disable and accelerometer:
+                try:
+                    accelerometer.disable()
+                except Exception:
+                    pass
 
     # -------------------- Voice Recognition --------------------
-    def init_vosk(self, model_path):
+    def init_vosk(self, model_path=MODEL_PATH):
+        """Start voice activation; the model loads in the background and listening starts after."""
         if not os.path.exists(model_path):
             print(f"[DEBUG] Vosk model missing at: {model_path}")
             return
+        if self._model_path is not None:
+            return
+
+        self._model_path = model_path
+        self.vosk_initialized = True
+        get_model_cache().acquire(
+            model_path, lambda model: Clock.schedule_once(lambda dt: self._on_model_ready(model_path, model)))
 
-        self.voice_model = Model(model_path)
-        self.recognizer = KaldiRecognizer(self.voice_model, 16000)
-        self._voice_queue = queue.Queue()
+    def _on_model_ready(self, model_path, model):
+        if self._model_path != model_path or self.voice_model is not None:
+            return   # voice was turned off (or restarted) while the model loaded
+        if model is None:
+            self.stop_voice_listening()
+            return
+
+        self.voice_model = model
+        self.recognizer = self._make_recognizer()
+        if self._evidence is None and self.settings.get("audio_evidence", True):
+            self._evidence = EvidenceRecorder(rate=16000)
+        self._audio_queue = queue.Queue(maxsize=AUDIO_QUEUE_CHUNKS)
+        self._voice_stop = threading.Event()
+        self._matcher.end_utterance()
+        # Only audio around speech reaches the recognizer
+        self._vad = VoiceActivityGate(rate=16000)
         self.is_listening = True
 
         if pyaudio:
@@ -191,60 +313,129 @@ class SOSHandler:
             self._voice_thread = threading.Thread(target=self._android_voice_loop, daemon=True)
         else:
             print("[DEBUG] No audio input available.")
+            self.stop_voice_listening()
             return
 
         self._voice_thread.start()
-        self._voice_event = Clock.schedule_interval(self._process_voice_queue, 0.1)
         self.vosk_initialized = True
         print("[DEBUG] Vosk initialized and listening.")
 
+    def _make_recognizer(self):
+        """
+        In keyword-spotting mode the decoder may only output the activation
+        phrase or [unk], which is cheaper to decode and cannot produce a
+        transcript that merely contains the phrase's words by chance.
+        """
+        if self.settings.get("voice_keyword_spotting", True):
+            return make_recognizer(self.voice_model, json.dumps(self.voice_phrases + [UNKNOWN_WORD]))
+        return make_recognizer(self.voice_model)
+
+    def _rebuild_recognizer(self):
+        # The voice thread picks the new recognizer up at its next chunk
+        if self.voice_model is not None:
+            self.recognizer = self._make_recognizer()
+
+    def _recognize(self, data):
+        evidence = self._evidence
+        if evidence is not None and self.settings.get("audio_evidence", True):
+            evidence.write(data)
+        recognizer = self.recognizer
+        chunks, ended = self._vad.feed(data) if self._vad is not None else ([data], False)
+        for chunk in chunks:
+            self._decode(recognizer, chunk)
+        if ended:
+            # Silence is never fed, so close the utterance explicitly
+            self._on_text(json.loads(recognizer.FinalResult()).get("text", ""), final=True)
+
+    def _decode(self, recognizer, data):
+        if recognizer.AcceptWaveform(data):
+            self._on_text(json.loads(recognizer.Result()).get("text", ""), final=True)
+        else:
+            self._on_text(json.loads(recognizer.PartialResult()).get("partial", ""))
+
+    def _on_text(self, text, final=False):
+        # Runs on the voice thread: match here and only wake the UI for a trigger
+        text = " ".join(text.replace(UNKNOWN_WORD, " ").lower().split())
+        if not text and not final:
+            return
+        heard_at = self._voice_clock()
+        matched = self._match_voice(text, heard_at, final)
+        if matched:
+            self._voice_triggered(matched, heard_at)
+
     def _desktop_voice_loop(self):
         try:
             while self.is_listening:
                 data = self.audio_stream.read(4096, exception_on_overflow=False)
-                if self.recognizer.AcceptWaveform(data):
-                    text = json.loads(self.recognizer.Result()).get("text", "").lower()
-                    if text:
-                        self._voice_queue.put(text)
-                else:
-                    partial = json.loads(self.recognizer.PartialResult()).get("partial", "").lower()
-                    if partial:
-                        self._voice_queue.put(partial)
+                self._recognize(data)
         except Exception as e:
             print("[ERROR] Desktop voice loop error:", e)
 
     def _android_voice_loop(self):
-        try:
-            def callback(data):
-                if not self.is_listening:
-                    return
-                if self.recognizer.AcceptWaveform(data):
-                    text = json.loads(self.recognizer.Result()).get("text", "").lower()
-                    if text:
-                        self._voice_queue.put(text)
-                else:
-                    partial = json.loads(self.recognizer.PartialResult()).get("partial", "").lower()
-                    if partial:
-                        self._voice_queue.put(partial)
+        # The microphone callback only enqueues; this thread sleeps in get()
+        # until audio (or the stop sentinel) arrives
+        stop, audio = self._voice_stop, self._audio_queue
 
+        def callback(data):
+            if stop.is_set():
+                return
+            if not self._offer_audio(audio, data):
+                self.dropped_audio_chunks += 1
+
+        try:
             microphone.start(callback)
-            while self.is_listening:
-                pass
-            microphone.stop()
+            while not stop.is_set():
+                data = audio.get()
+                if data is None:
+                    break
+                self._recognize(data)
         except Exception as e:
             print("[ERROR] Android voice loop error:", e)
+        finally:
+            try:
+                microphone.stop()
+            except Exception:
+                pass
 
-    def _process_voice_queue(self, dt):
-        while not self._voice_queue.empty():
-            phrase = self._voice_queue.get()
-            if self.voice_phrase in phrase:
-                self.on_trigger_detected("Voice")
+    @staticmethod
+    def _offer_audio(audio, data):
+        """Non-blocking put; makes room by dropping the oldest chunk. False if one was dropped."""
+        try:
+            audio.put_nowait(data)
+            return True
+        except queue.Full:
+            pass
+        try:
+            audio.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            audio.put_nowait(data)
+        except queue.Full:
+            pass
+        return False
+
+    def _voice_triggered(self, phrase, heard_at):
+        Clock.schedule_once(lambda dt: self._on_voice_trigger(phrase, heard_at))
+
+    def _on_voice_trigger(self, phrase, heard_at):
+        if not self.is_listening:
+            return   # voice was turned off before the main thread got here
+        trace = tracer.start_trace("Voice", start=heard_at, phrase=phrase)
+        with trace.root, tracer.activate(trace):
+            self.on_trigger_detected("Voice")
+
+    def _match_voice(self, text, heard_at, final):
+        """The activation phrase `text` fires, if any (deduplicated and rate limited)."""
+        matched = self._matcher.feed(text, heard_at) if text else []
+        if final:
+            self._matcher.end_utterance()
+        return matched[0] if matched else None
 
     def stop_voice_listening(self):
         self.is_listening = False
-        if self._voice_event:
-            Clock.unschedule(self._voice_event)
-            self._voice_event = None
+        self._voice_stop.set()
+        self._offer_audio(self._audio_queue, None)   # wake the Android worker
 
         if self.audio_stream:
             try:
@@ -264,26 +455,73 @@ class SOSHandler:
             except Exception:
                 pass
 
+        # Give the model back; it is freed once no handler uses it
+        if self._model_path is not None:
+            get_model_cache().release(self._model_path)
+            self._model_path = None
+        self.voice_model = None
+        self.recognizer = None
+        self.vosk_initialized = False
         print("[DEBUG] Voice listening stopped.")
 
     # -------------------- Trigger & Countdown --------------------
     def on_trigger_detected(self, trigger):
-        print(f"[DEBUG] {trigger} detected. Starting countdown...")
-        if self._countdown_event:
-            return
-        self._remaining_seconds = self.settings.get("countdown_seconds", 5)
-        self.show_countdown_popup(trigger)
-        self._countdown_event = Clock.schedule_interval(lambda dt: self._countdown_tick(trigger), 1)
+        trace = tracer.current()
+        if trace is None:
+            # Called directly rather than from a detector: trace from here
+            trace = tracer.start_trace(trigger)
+            with trace.root, tracer.activate(trace):
+                return self.on_trigger_detected(trigger)
+
+        with tracer.span("on_trigger_detected"):
+            if not self.settings.get("countdown_enabled", True):
+                # One send per trigger type while its undo window is open
+                # (a double tap must not fan out twice)
+                sent_at = self._sent_at.get(trigger)
+                if sent_at is not None and time.monotonic() - sent_at < UNDO_SECONDS:
+                    print(f"[DEBUG] {trigger} detected again; alert already sent.")
+                    return
+                self._sent_at[trigger] = time.monotonic()
+                self._capture_evidence(trigger)
+                print(f"[DEBUG] {trigger} detected. Sending immediately.")
+                self.send_alert(trigger)
+                self.show_undo_popup(trigger)
+                return
+
+            print(f"[DEBUG] {trigger} detected. Starting countdown...")
+            if self._countdown_event:
+                return
+            self._capture_evidence(trigger)
+            self._remaining_seconds = self.settings.get("countdown_seconds", 5)
+            self._countdown_trace = trace
+            self._countdown_span = tracer.span("countdown", trace, seconds=self._remaining_seconds)
+            self.show_countdown_popup(trigger)
+            self._countdown_event = Clock.schedule_interval(lambda dt: self._countdown_tick(trigger), 1)
+
+    def _capture_evidence(self, trigger):
+        # Only notes the buffer position; the file is written in the background
+        evidence = self._evidence
+        if evidence is not None and self.is_listening and self.settings.get("audio_evidence", True):
+            evidence.capture(label=f"sos-{trigger.lower()}")
 
     def _countdown_tick(self, trigger):
         self._remaining_seconds -= 1
         if self.countdown_popup:
             self.countdown_popup.content.children[1].text = f"Sending {trigger} alert in {self._remaining_seconds} sec"
         if self._remaining_seconds <= 0:
+            trace, span = self._countdown_trace, self._countdown_span
+            self._countdown_span = None
             self.cancel_countdown()
-            self.send_alert(trigger)
+            if span is not None:
+                span.finish()
+            with tracer.activate(trace):
+                self.send_alert(trigger)
 
     def cancel_countdown(self, *args):
+        if self._countdown_span is not None:
+            self._countdown_span.finish(cancelled=True)
+            self._countdown_span = None
+        self._countdown_trace = None
         if self._countdown_event:
             Clock.unschedule(self._countdown_event)
             self._countdown_event = None
@@ -303,55 +541,143 @@ class SOSHandler:
         self.countdown_popup = Popup(title=f"{trigger} SOS Countdown", content=layout, size_hint=(0.8, 0.4))
         self.countdown_popup.open()
 
+    # -------------------- Undo (immediate mode) --------------------
+    def show_undo_popup(self, trigger):
+        if self.undo_popup:
+            self.undo_popup.dismiss()
+        layout = BoxLayout(orientation="vertical", spacing=10)
+        layout.add_widget(Label(text=f"{trigger} alert sent."))
+        undo_btn = Button(text="Undo (send all-clear)", size_hint_y=None, height=40)
+        undo_btn.bind(on_release=self.undo_alert)
+        layout.add_widget(undo_btn)
+        popup = Popup(title=f"{trigger} SOS Sent", content=layout, size_hint=(0.8, 0.4))
+        popup.open()
+        self.undo_popup = popup
+        Clock.schedule_once(lambda dt: self._dismiss_undo_popup(popup), UNDO_SECONDS)
+
+    def _dismiss_undo_popup(self, popup):
+        if self.undo_popup is popup:
+            popup.dismiss()
+            self.undo_popup = None
+
+    def undo_alert(self, *args):
+        self._dismiss_undo_popup(self.undo_popup)
+        if not self._last_alert:
+            return
+        numbers, cancel_follow_up = self._last_alert
+        self._last_alert = None
+        self._sent_at.clear()        # after an all-clear a new SOS must go out
+        if cancel_follow_up:
+            cancel_follow_up()
+        get_dispatcher().submit(numbers, compose("all_clear"), on_result=self._on_send_result)
+
     # -------------------- Send SOS --------------------
     def send_alert(self, trigger="Unknown"):
-        lat, lon = self.current_location.get("lat"), self.current_location.get("lon")
-        location_url = f"https://maps.google.com/?q={lat},{lon}" if lat and lon else "Location unknown"
-        message = f"EMERGENCY! Trigger: {trigger}. Location: {location_url}"
-
-        if not isinstance(self.contacts, (list, tuple)):
-            print("[WARNING] contacts is not iterable. Skipping SMS sending.")
-            self.contacts = []
-
-        for contact in self.contacts:
-            if isinstance(contact, dict) and "phone" in contact:
-                try:
-                    send_sos_message(contact, message)
-                    print(f"[INFO] SOS sent to {contact['phone']}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to send SOS to {contact}: {e}")
-            else:
-                print(f"[WARNING] Invalid contact skipped: {contact}")
+        # Send immediately with the last known fix, however old
+        with tracer.span("send_alert") as span:
+            fix = get_location_service().last_fix()
+            message = self._alert_message(trigger, fix)
+            numbers = list(self._recipients)
+            span.attrs["recipients"] = len(numbers)
+
+            # Sends run on the dispatcher's worker pool; this returns immediately
+            batch = get_dispatcher().submit(
+                numbers, message,
+                on_result=self._on_send_result,
+                on_done=lambda batch: Clock.schedule_once(lambda dt: self._on_alert_delivered(trigger, batch))
+            )
+        cancel_follow_up = None
+        if numbers:
+            cancel_follow_up = follow_up_if_needed(fix, lambda better: self.send_location_update(numbers, better))
+        self._last_alert = (numbers, cancel_follow_up)
+        return batch
+
+    def send_location_update(self, numbers, fix):
+        message = compose("update", fix.lat, fix.lon)
+        return get_dispatcher().submit(numbers, message, on_result=self._on_send_result)
+
+    def _on_send_result(self, number, ok, error=None):
+        if ok:
+            print(f"[INFO] SOS sent to {number}")
+        else:
+            print(f"[ERROR] Failed to send SOS to {number}: {error}")
 
+    def _on_alert_delivered(self, trigger, batch):
         if notification:
             try:
-                notification.notify(title=f"{trigger} SOS Alert", message="Alert sent to contacts", timeout=5)
+                notification.notify(title=f"{trigger} SOS Alert",
+                                    message=f"Alert sent to {len(batch.sent)} of {batch.total} contacts",
+                                    timeout=5)
             except Exception:
                 pass
 
     # -------------------- Settings --------------------
-    def apply_settings(self):
-        # Shake
-        if self.settings.get("shake_enabled"):
-            self.start_shake_monitoring()
-        else:
-            self.stop_shake_monitoring()
-        self.shake_threshold = max(2.0, 15.0 - (self.settings.get("shake_sensitivity", 5) * 1.2))
+    def apply_settings(self, changed=None):
+        """
+        Bring subsystems in line with self.settings. With `changed` (a set of
+        keys) only the subsystems owning one of those keys are touched;
+        None applies everything.
+        """
+        def touched(subsystem):
+            return changed is None or not changed.isdisjoint(SUBSYSTEM_KEYS[subsystem])
+
+        phrase_keys = {"voice_phrase", "voice_phrases", "voice_language"}
+        if changed is None or not changed.isdisjoint(phrase_keys):
+            self.voice_phrase = (self.settings.get("voice_phrase") or self.voice_phrase).lower()
+            phrases = self._active_phrases()
+            if phrases != self.voice_phrases:
+                self.voice_phrases = phrases
+                self._matcher = PhraseMatcher(phrases)
+                if changed is None or "voice_language" not in changed:
+                    self._rebuild_recognizer()   # a new language restarts voice below
+        if changed is not None and "voice_keyword_spotting" in changed:
+            self._rebuild_recognizer()
+        if changed is not None and "audio_evidence" in changed:
+            if not self.settings.get("audio_evidence", True):
+                self._evidence = None    # stop buffering microphone audio right away
+            elif self._evidence is None and self.voice_model is not None:
+                self._evidence = EvidenceRecorder(rate=16000)
+
+        # Shake (sensitivity only moves the threshold; polling keeps running)
+        if touched("shake"):
+            if self.settings.get("shake_enabled"):
+                self.start_shake_monitoring()
+            else:
+                self.stop_shake_monitoring()
+        self.shake_threshold = shake_threshold_for(self.settings.get("shake_sensitivity", 5))
+        if self._shake_sampler is not None:
+            self._shake_sampler.detector.threshold = self.shake_threshold
 
         # Voice
-        if self.settings.get("voice_enabled") and not self.vosk_initialized:
-            model_path = os.path.join(os.getcwd(), "vosk-model", "vosk-model-small-en-us-0.15")
-            self.init_vosk(model_path)
-        else:
-            self.stop_voice_listening()
+        if touched("voice"):
+            if self.settings.get("voice_enabled"):
+                model_path = model_path_for(self.settings.get("voice_language", DEFAULT_LANGUAGE))
+                if self._model_path not in (None, model_path):
+                    # The running model cannot hear another language's phrases
+                    self.stop_voice_listening()
+                if not self.vosk_initialized:
+                    self.init_vosk(model_path)
+            elif self.is_listening or self.vosk_initialized:
+                self.stop_voice_listening()
 
         # Floating button
+        if touched("floating"):
+            self.apply_floating()
+
+    def apply_floating(self):
         if self.settings.get("floating_enabled"):
             enable_floating(size=self.settings.get("button_size", 80),
-                            callback=lambda: self.on_trigger_detected("Button"))
+                            callback=self._on_floating_pressed)
+            set_button_size(self.settings.get("button_size", 80))
         else:
             disable_floating()
 
+    def _on_floating_pressed(self):
+        self.on_trigger_detected("Button")
+
     def update_settings(self, new_settings):
+        changed = {k for k, v in new_settings.items() if self.settings.get(k) != v}
+        if not changed:
+            return
         self.settings.update(new_settings)
-        self.apply_settings()
+        self.apply_settings(changed)
@@ -0,0 +1,199 @@
+# sms_compose.py
+"""
+SOS message composer that keeps alerts inside a single SMS segment.
+
+A message is GSM-7 (160 chars, 153 per part when split) unless it contains
+a character outside the GSM alphabet, in which case the whole message is
+UCS-2 (70 / 67 UTF-16 units). Each template lists location encodings from
+most to least readable; the first that fits wins.
+"""
+
+# -------------------- Segment Length --------------------
+GSM7_BASIC = (
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENSION = "^{}\\[~]|€\f"   # each costs two septets (escape + char)
+_GSM7_BASIC = frozenset(GSM7_BASIC)
+_GSM7_EXTENSION = frozenset(GSM7_EXTENSION)
+
+SEGMENT_LIMITS = {
+    "gsm7": (160, 153),
+    "ucs2": (70, 67),
+}
+
+
+def segment_info(text):
+    """Return (encoding, units, segments) for `text`."""
+    units = 0
+    for ch in text:
+        if ch in _GSM7_BASIC:
+            units += 1
+        elif ch in _GSM7_EXTENSION:
+            units += 2
+        else:
+            encoding = "ucs2"
+            units = len(text.encode("utf-16-le")) // 2
+            break
+    else:
+        encoding = "gsm7"
+
+    single, multi = SEGMENT_LIMITS[encoding]
+    if units <= single:
+        segments = 1
+    else:
+        segments = -(-units // multi)
+    return encoding, units, segments
+
+
+def fits(text, max_segments=1):
+    return segment_info(text)[2] <= max_segments
+
+
+# -------------------- Location Encodings --------------------
+_OLC_ALPHABET = "23456789CFGHJMPQRVWX"
+_OLC_LAT_PRECISION = 8000 * 5 ** 5
+_OLC_LNG_PRECISION = 8000 * 4 ** 5
+
+
+def plus_code(lat, lon):
+    """Open Location Code with 11 digits (~3 x 3 m), e.g. '7Q62HXXM+RM4'."""
+    lat = min(90.0, max(-90.0, lat))
+    lon = (lon + 180.0) % 360.0 - 180.0
+    if lat == 90.0:
+        lat -= 0.000125 / 5
+    lat_val = int(round((lat + 90) * _OLC_LAT_PRECISION, 6))
+    lng_val = int(round((lon + 180) * _OLC_LNG_PRECISION, 6))
+
+    # One grid digit (5 rows x 4 columns) refines the ten pair digits
+    lat_val //= 5 ** 4
+    lng_val //= 4 ** 4
+    grid = (lat_val % 5) * 4 + (lng_val % 4)
+    lat_val //= 5
+    lng_val //= 4
+    code = ""
+    for _ in range(5):
+        code = _OLC_ALPHABET[lat_val % 20] + _OLC_ALPHABET[lng_val % 20] + code
+        lat_val //= 20
+        lng_val //= 20
+    return code[:8] + "+" + code[8:] + _OLC_ALPHABET[grid]
+
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat, lon, precision=8):
+    """Standard base-32 geohash; 8 characters is about 19 x 19 m."""
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    code, bits, ch, even = [], 0, 0, True
+    while len(code) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                ch, lon_lo = ch * 2 + 1, mid
+            else:
+                ch, lon_hi = ch * 2, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch, lat_lo = ch * 2 + 1, mid
+            else:
+                ch, lat_hi = ch * 2, mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            code.append(_GEOHASH_ALPHABET[ch])
+            bits, ch = 0, 0
+    return "".join(code)
+
+
+def _trim(value, digits):
+    return f"{value:.{digits}f}".rstrip("0").rstrip(".")
+
+
+LOCATION_FORMATS = {
+    # name: renderer(lat, lon)
+    "maps_full": lambda lat, lon: f"https://maps.google.com/?q={lat},{lon}",
+    "maps_5": lambda lat, lon: f"https://maps.google.com/?q={_trim(lat, 5)},{_trim(lon, 5)}",
+    "maps_4": lambda lat, lon: f"https://maps.google.com/?q={_trim(lat, 4)},{_trim(lon, 4)}",
+    "plus_url": lambda lat, lon: f"https://plus.codes/{plus_code(lat, lon)}",
+    "geohash_url": lambda lat, lon: f"https://geohash.org/{geohash(lat, lon)}",
+    "coords_5": lambda lat, lon: f"{_trim(lat, 5)},{_trim(lon, 5)}",
+    "plus": lambda lat, lon: plus_code(lat, lon),
+    "geohash": lambda lat, lon: geohash(lat, lon),
+}
+
+UNKNOWN_LOCATION = "unknown"
+
+
+# -------------------- Templates --------------------
+DEFAULT_FORMATS = ["maps_5", "maps_4", "plus_url", "coords_5", "plus"]
+
+TEMPLATES = {
+    "report": {
+        "text": "EMERGENCY ({category})! {address}Location: {location}",
+        "location_formats": DEFAULT_FORMATS,
+        "max_segments": 1,
+    },
+    "alert": {
+        "text": "EMERGENCY! Trigger: {trigger}. {address}Location: {location}",
+        "location_formats": DEFAULT_FORMATS,
+        "max_segments": 1,
+    },
+    "update": {
+        "text": "EMERGENCY update: {address}current location {location}",
+        "location_formats": DEFAULT_FORMATS,
+        "max_segments": 1,
+    },
+    "all_clear": {
+        "text": "False alarm: please disregard my previous SOS. I am safe.",
+        "location_formats": [],
+        "max_segments": 1,
+    },
+    "one_tap": {
+        "text": "SOS! {address}My location: {location}",
+        "location_formats": ["coords_5", "plus"],
+        "max_segments": 1,
+    },
+}
+
+
+def set_template(name, text=None, location_formats=None, max_segments=None):
+    """Override (or add) a template's text, location encodings or segment budget."""
+    template = TEMPLATES.setdefault(name, {"text": "{location}", "location_formats": DEFAULT_FORMATS,
+                                           "max_segments": 1})
+    if text is not None:
+        template["text"] = text
+    if location_formats is not None:
+        unknown = [f for f in location_formats if f not in LOCATION_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown location format(s): {unknown}")
+        template["location_formats"] = list(location_formats)
+    if max_segments is not None:
+        template["max_segments"] = max_segments
+
+
+def compose(name, lat=None, lon=None, address=None, **fields):
+    """
+    Render template `name`, picking the most readable location encoding that
+    keeps the message within the template's segment budget. The address is
+    dropped before giving up; if nothing fits, the shortest rendering is used.
+    """
+    template = TEMPLATES[name]
+    max_segments = template.get("max_segments", 1)
+    has_location = lat is not None and lon is not None
+    # A template without location formats (e.g. all_clear) renders as if no fix were given
+    formats = (template["location_formats"] or [None]) if has_location else [None]
+    addresses = [f"Near {address}. ", ""] if address else [""]
+
+    shortest, shortest_cost = None, None
+    for address_text in addresses:
+        for fmt in formats:
+            location = LOCATION_FORMATS[fmt](lat, lon) if fmt else UNKNOWN_LOCATION
+            text = template["text"].format(location=location, address=address_text, **fields)
+            _, units, segments = segment_info(text)
+            if segments <= max_segments:
+                return text
+            if shortest is None or (segments, units) < shortest_cost:
+                shortest, shortest_cost = text, (segments, units)
+    return shortest
@@ -0,0 +1,199 @@
+# sms_transport.py
+import json, os, platform, random, socket, socketserver, sys, threading, time
+
+IS_ANDROID = platform.system() == "Linux" and "ANDROID_ARGUMENT" in sys.argv
+
+
+# -------------------- Transports --------------------
+class SMSTransport:
+    """Where send_sms() hands messages off. send() returns True on success."""
+
+    name = "base"
+
+    def send(self, number, message):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class AndroidTransport(SMSTransport):
+    """Real SMS through android.telephony.SmsManager."""
+
+    name = "android"
+
+    def __init__(self):
+        from jnius import autoclass
+        self._manager = autoclass("android.telephony.SmsManager").getDefault()
+
+    def send(self, number, message):
+        try:
+            self._manager.sendTextMessage(number, None, message, None, None)
+            print(f"[SMS] Sent to {number}")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Failed to send SMS to {number}: {e}")
+            return False
+
+
+class NullTransport(SMSTransport):
+    """Drops messages. With verbose=True it prints the desktop [SIMULATION] line."""
+
+    name = "null"
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def send(self, number, message):
+        with self._lock:
+            self.count += 1
+        if self.verbose:
+            print(f"[SIMULATION] SMS to {number}: {message}")
+        return True
+
+
+class LoopbackTransport(SMSTransport):
+    """
+    Client for LoopbackSMSC. `address` is a (host, port) tuple for TCP or a
+    filesystem path for a Unix socket. Each sending thread keeps its own
+    connection so a worker pool sends in parallel.
+    """
+
+    name = "loopback"
+
+    def __init__(self, address, timeout=5.0):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+        self._conns = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.address)
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        with self._lock:
+            self._conns.append(conn)
+        return conn
+
+    def send(self, number, message):
+        conn = getattr(self._local, "conn", None)
+        try:
+            if conn is None:
+                conn = self._local.conn = self._connect()
+            sock, reader = conn
+            sock.sendall(json.dumps({"to": number, "msg": message}).encode("utf-8") + b"\n")
+            reply = reader.readline()
+        except OSError as e:
+            self._local.conn = None
+            print(f"[ERROR] Loopback SMSC unreachable: {e}")
+            return False
+        return reply.startswith(b"OK")
+
+    def close(self):
+        with self._lock:
+            for sock, reader in self._conns:
+                try:
+                    reader.close()
+                    sock.close()
+                except OSError:
+                    pass
+            self._conns = []
+
+
+# -------------------- Fake SMSC --------------------
+class _SMSCHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        smsc = self.server.smsc
+        for line in self.rfile:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                self.wfile.write(b"ERR bad request\n")
+                continue
+            reply = smsc._deliver(record["to"], record["msg"])
+            self.wfile.write(reply)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+class LoopbackSMSC:
+    """
+    Local fake SMS centre for load tests. Records every message with its
+    arrival time and can inject latency (seconds per message) and failures
+    (probability, or a set of numbers that always fail).
+    """
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, failure_rate=0.0, fail_numbers=()):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_numbers = set(fail_numbers)
+        self.messages = []
+        self._lock = threading.Lock()
+        if isinstance(address, str):
+            if _UnixServer is None:
+                raise ValueError("Unix sockets are not available on this platform")
+            if os.path.exists(address):
+                os.remove(address)
+            self._server = _UnixServer(address, _SMSCHandler)
+        else:
+            self._server = _TCPServer(address, _SMSCHandler)
+        self._server.smsc = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="loopback-smsc", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def _deliver(self, number, message):
+        if self.latency:
+            time.sleep(self.latency)
+        if number in self.fail_numbers or (self.failure_rate and random.random() < self.failure_rate):
+            return b"ERR rejected\n"
+        with self._lock:
+            self.messages.append((time.monotonic(), number, message))
+        return b"OK\n"
+
+
+# -------------------- Active Transport --------------------
+_transport = None
+
+
+def get_transport():
+    """Transport used by floating_button.send_sms (Android, or a printing null transport)."""
+    global _transport
+    if _transport is None:
+        _transport = AndroidTransport() if IS_ANDROID else NullTransport(verbose=True)
+    return _transport
+
+
+def set_transport(transport):
+    global _transport
+    _transport = transport
@@ -0,0 +1,246 @@
+# sos_dispatch.py
+import threading, queue, time
+
+from contact_import import phone_key
+from sos_outbox import Outbox, REPLAY_MAX_AGE
+from sos_trace import tracer
+
+# -------------------- Defaults --------------------
+WORKERS = 4             # concurrent sends
+RATE_PER_SECOND = 2.0   # sustained sends per carrier
+BURST = 10              # sends a carrier accepts back-to-back
+MAX_ATTEMPTS = 3        # first try + retries per recipient
+BACKOFF_SECONDS = 1.0   # doubled after every failed attempt
+
+
+def carrier_key(number):
+    """
+    Bucket key for rate limiting. The first three national digits identify
+    the mobile network prefix (e.g. 917 -> Globe), which is what carriers
+    throttle on.
+    """
+    return phone_key(number)[:3]
+
+
+# -------------------- Rate Limiting --------------------
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `burst` banked."""
+
+    def __init__(self, rate=RATE_PER_SECOND, burst=BURST):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, stop_event=None):
+        """Block until a token is available. Returns False if stopped while waiting."""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+# -------------------- Batches --------------------
+class DispatchBatch:
+    """
+    Progress of one alert fan-out. Callbacks run on a worker thread; UI code
+    should hop back to the main thread (e.g. Clock.schedule_once).
+    """
+
+    def __init__(self, numbers, message, on_result=None, on_done=None, trace=None):
+        self.message = message
+        self.trace = trace
+        self.total = len(numbers)
+        self.sent = []
+        self.failed = []
+        self.on_result = on_result
+        self.on_done = on_done
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if not numbers:
+            self._finish()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _record(self, number, ok, error=None):
+        with self._lock:
+            (self.sent if ok else self.failed).append(number)
+            complete = len(self.sent) + len(self.failed) == self.total
+        if self.on_result:
+            try:
+                self.on_result(number, ok, error)
+            except Exception as e:
+                print("[ERROR] Dispatch result callback failed:", e)
+        if complete:
+            self._finish()
+
+    def _finish(self):
+        self.finished = time.monotonic()
+        self._done.set()
+        if self.on_done:
+            try:
+                self.on_done(self)
+            except Exception as e:
+                print("[ERROR] Dispatch done callback failed:", e)
+
+
+class _Job:
+    __slots__ = ("batch", "number", "attempt", "job_id")
+
+    def __init__(self, batch, number, job_id=None):
+        self.batch = batch
+        self.number = number
+        self.attempt = 0
+        self.job_id = job_id
+
+
+# -------------------- Dispatcher --------------------
+class SOSDispatcher:
+    """
+    Fans an SOS message out to many recipients off the UI thread.
+
+    A fixed pool of worker threads drains one job queue. Each send first takes
+    a token from its carrier's bucket; failed sends are re-queued with
+    exponential backoff until MAX_ATTEMPTS is reached.
+
+    With an `outbox`, every send is journaled before it starts and confirmed
+    when it finishes, so replay_outbox() can resume after a crash.
+    """
+
+    def __init__(self, send=None, workers=WORKERS, rate=RATE_PER_SECOND, burst=BURST,
+                 max_attempts=MAX_ATTEMPTS, backoff=BACKOFF_SECONDS, carrier_of=carrier_key,
+                 outbox=None):
+        if send is None:
+            from floating_button import send_sms as send
+        self.send = send
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.carrier_of = carrier_of
+        self.outbox = outbox
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._workers = []
+        for i in range(max(1, workers)):
+            t = threading.Thread(target=self._worker, name=f"sos-dispatch-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def submit(self, numbers, message, on_result=None, on_done=None, job_ids=None, trace=None):
+        """
+        Queue `message` for every number and return its DispatchBatch
+        immediately. Sends are traced under `trace` (default: the active one).
+        """
+        numbers = [n for n in numbers if n]
+        batch = DispatchBatch(numbers, message, on_result, on_done, trace or tracer.current())
+        jobs = [_Job(batch, number) for number in numbers]
+        if self.outbox is not None:
+            if job_ids is None:
+                # One fsync covers the whole fan-out
+                for job in jobs:
+                    job.job_id = Outbox.new_id()
+                self.outbox.record_pending([(job.job_id, job.number, message) for job in jobs])
+            else:
+                for job, job_id in zip(jobs, job_ids):
+                    job.job_id = job_id
+        for job in jobs:
+            self._queue.put(job)
+        return batch
+
+    def replay_outbox(self, on_done=None):
+        """Re-queue sends a previous run journaled but never confirmed, unless older than REPLAY_MAX_AGE."""
+        if self.outbox is None:
+            return []
+        remaining, expired = self.outbox.compact()
+        if expired:
+            print(f"[INFO] Dropped {len(expired)} unsent SOS message(s) older than "
+                  f"{REPLAY_MAX_AGE // 60} min from outbox")
+        by_message = {}
+        for record in remaining:
+            by_message.setdefault(record["msg"], []).append(record)
+        batches = []
+        for message, records in by_message.items():
+            print(f"[INFO] Replaying {len(records)} unsent SOS message(s) from outbox")
+            batches.append(self.submit([r["to"] for r in records], message, on_done=on_done,
+                                       job_ids=[r["id"] for r in records]))
+        return batches
+
+    def shutdown(self, timeout=1.0):
+        self._stop.set()
+        for _ in self._workers:
+            self._queue.put(None)
+        for t in self._workers:
+            t.join(timeout=timeout)
+        self._workers = []
+
+    def _bucket(self, number):
+        key = self.carrier_of(number)
+        with self._buckets_lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def _worker(self):
+        while not self._stop.is_set():
+            job = self._queue.get()
+            if job is None:
+                break
+            if not self._bucket(job.number).acquire(self._stop):
+                break
+            job.attempt += 1
+            error = None
+            span = tracer.span("send_sms", job.batch.trace, attempt=job.attempt) if job.batch.trace else None
+            try:
+                ok = self.send(job.number, job.batch.message) is not False
+            except Exception as e:
+                ok, error = False, e
+            if span is not None:
+                span.finish(ok=ok)
+
+            if ok or job.attempt >= self.max_attempts:
+                if self.outbox is not None and job.job_id:
+                    self.outbox.record_done(job.job_id, ok)
+                job.batch._record(job.number, ok, error)
+            else:
+                delay = self.backoff * (2 ** (job.attempt - 1))
+                print(f"[WARNING] SMS to {job.number} failed (attempt {job.attempt}), retrying in {delay:.1f}s")
+                timer = threading.Timer(delay, self._queue.put, (job,))
+                timer.daemon = True
+                timer.start()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """App-wide dispatcher, created on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = SOSDispatcher(outbox=Outbox())
+        return _dispatcher
@@ -0,0 +1,123 @@
+# sos_outbox.py
+import json, os, threading, time, uuid
+
+OUTBOX_FILE = "sos_outbox.jsonl"
+SYNC_INTERVAL = 0.2     # max seconds a confirmation waits for fsync
+SYNC_BATCH = 32         # confirmations that force an immediate fsync
+REPLAY_MAX_AGE = 3600   # seconds; older unsent SOS carry a stale location and are not resent
+
+
+class Outbox:
+    """
+    Append-only journal of SOS sends (one JSON object per line).
+
+    "pending" records are fsynced before any of their sends start, so a crash
+    can never lose a recipient. "sent"/"failed" confirmations are fsynced in
+    batches by a background thread; a confirmation lost in a crash only means
+    that one send is repeated on replay.
+    """
+
+    def __init__(self, path=OUTBOX_FILE, sync_interval=SYNC_INTERVAL, sync_batch=SYNC_BATCH):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._flusher = threading.Thread(target=self._flush_loop, name="sos-outbox", daemon=True)
+        self._flusher.start()
+
+    @staticmethod
+    def new_id():
+        return uuid.uuid4().hex
+
+    # -------------------- Writing --------------------
+    def _write(self, records):
+        for record in records:
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _sync_locked(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def record_pending(self, entries):
+        """Durably journal [(id, number, message), ...] before they are sent."""
+        now = time.time()
+        with self._lock:
+            self._write({"op": "pending", "id": job_id, "to": number, "msg": message, "ts": now}
+                        for job_id, number, message in entries)
+            self._sync_locked()
+
+    def record_done(self, job_id, ok):
+        with self._lock:
+            self._write([{"op": "sent" if ok else "failed", "id": job_id, "ts": time.time()}])
+            self._unsynced += 1
+            if self._unsynced >= self.sync_batch:
+                self._sync_locked()
+                return
+        self._wake.set()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(self.sync_interval)
+            with self._lock:
+                if self._unsynced and not self._closed:
+                    self._sync_locked()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._sync_locked()
+            self._file.close()
+        self._wake.set()
+
+    # -------------------- Replay --------------------
+    def unfinished(self):
+        """Pending records without a sent/failed confirmation, in journal order."""
+        pending = {}
+        with self._lock:
+            self._file.flush()
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash mid-write
+                    if record.get("op") == "pending":
+                        pending[record["id"]] = record
+                    else:
+                        pending.pop(record.get("id"), None)
+        return list(pending.values())
+
+    def compact(self, max_age=REPLAY_MAX_AGE):
+        """
+        Rewrite the journal keeping only unfinished sends. Returns
+        (unfinished, expired): sends journaled more than `max_age` seconds
+        ago are not returned for replay but recorded as "expired" instead.
+        """
+        cutoff = time.time() - max_age
+        remaining, expired = [], []
+        for record in self.unfinished():
+            (remaining if record.get("ts", 0) >= cutoff else expired).append(record)
+        with self._lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in remaining:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                for record in expired:
+                    f.write(json.dumps({"op": "expired", "id": record["id"], "to": record["to"],
+                                        "ts": record.get("ts")}, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._unsynced = 0
+        return remaining, expired
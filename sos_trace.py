@@ -0,0 +1,164 @@
+# sos_trace.py
+"""
+Span tracing for the SOS path: trigger -> on_trigger_detected -> countdown
+-> send_alert -> every send_sms.
+
+Spans use time.monotonic() and land in a fixed-size ring buffer; nothing is
+written to disk unless export_jsonl() is called. The trace for the current
+trigger is carried through synchronous calls with a context variable and
+handed to the dispatcher explicitly.
+"""
+import contextlib, contextvars, itertools, json, threading, time
+from collections import deque
+
+TRACE_CAPACITY = 2000   # spans kept in memory
+TRACE_FILE = "sos_trace.jsonl"
+
+_current_trace = contextvars.ContextVar("sos_trace", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "name", "trigger", "start", "end", "attrs", "_tracer")
+
+    def __init__(self, tracer, trace_id, name, trigger, attrs):
+        self._tracer = tracer
+        self.trace_id = trace_id
+        self.name = name
+        self.trigger = trigger
+        self.start = time.monotonic()
+        self.end = None
+        self.attrs = attrs
+
+    def finish(self, **attrs):
+        if self.end is None:
+            self.end = time.monotonic()
+            self.attrs.update(attrs)
+            self._tracer._record(self)
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.attrs["error"] = repr(exc)
+        self.finish()
+
+    def as_dict(self):
+        record = {"trace": self.trace_id, "name": self.name, "trigger": self.trigger,
+                  "start": self.start, "end": self.end,
+                  "duration_ms": round((self.end - self.start) * 1000, 3)}
+        record.update(self.attrs)
+        return record
+
+
+class Trace:
+    """Identifies one trigger; its root span starts when the trigger was detected."""
+
+    __slots__ = ("trace_id", "trigger", "root")
+
+    def __init__(self, trace_id, trigger, root):
+        self.trace_id = trace_id
+        self.trigger = trigger
+        self.root = root
+
+
+class Tracer:
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self._spans = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    # -------------------- Recording --------------------
+    def start_trace(self, trigger, start=None, **attrs):
+        """
+        New trace for one trigger. `start` backdates the root span to when
+        the trigger was actually sensed (a monotonic timestamp). The root is
+        recorded once finished, e.g. `with trace.root, tracer.activate(trace):`.
+        """
+        trace_id = next(self._ids)
+        root = Span(self, trace_id, "trigger", trigger, attrs)
+        if start is not None:
+            root.start = start
+        return Trace(trace_id, trigger, root)
+
+    def span(self, name, trace=None, **attrs):
+        """Start a child span of `trace` (default: the active trace). Use as a context manager or call finish()."""
+        trace = trace or _current_trace.get()
+        if trace is None:
+            return Span(self, None, name, None, attrs)
+        return Span(self, trace.trace_id, name, trace.trigger, attrs)
+
+    def _record(self, span):
+        if span.trace_id is None:
+            return
+        with self._lock:
+            self._spans.append(span)
+
+    @contextlib.contextmanager
+    def activate(self, trace):
+        """Make `trace` the active trace for calls made inside the block."""
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+
+    @staticmethod
+    def current():
+        return _current_trace.get()
+
+    # -------------------- Reading --------------------
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def export_jsonl(self, path=TRACE_FILE):
+        spans = self.spans()
+        with open(path, "w") as f:
+            for span in spans:
+                f.write(json.dumps(span.as_dict()) + "\n")
+        return len(spans)
+
+    def summary(self):
+        """
+        {trigger: {"count", "p50_ms", "p95_ms"}} of the latency from the
+        trigger being sensed to the first successful send_sms returning.
+        """
+        starts, first_send = {}, {}
+        for span in self.spans():
+            if span.name == "trigger":
+                starts[span.trace_id] = (span.trigger, span.start)
+            elif span.name == "send_sms" and span.attrs.get("ok"):
+                prev = first_send.get(span.trace_id)
+                if prev is None or span.end < prev:
+                    first_send[span.trace_id] = span.end
+
+        latencies = {}
+        for trace_id, sent in first_send.items():
+            if trace_id in starts:
+                trigger, start = starts[trace_id]
+                latencies.setdefault(trigger, []).append((sent - start) * 1000)
+
+        return {trigger: {"count": len(values),
+                          "p50_ms": percentile(values, 50),
+                          "p95_ms": percentile(values, 95)}
+                for trigger, values in latencies.items()}
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+def percentile(values, pct):
+    """Linearly interpolated percentile of `values`; None when there are none."""
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+tracer = Tracer()
@@ -37,6 +37,10 @@ from button_settings import SettingsScreen
 from help import HelpScreen
 from profile import ProfileScreen
 from accounts import load_accounts, save_accounts
+from sos_dispatch import get_dispatcher
+from shake_voice_handler import SOSHandler
+from observable_settings import get_settings
+import contacts
 
 
 IS_ANDROID = platform.system() == "Linux" and "ANDROID_ARGUMENT" in os.sys.argv
@@ -916,6 +920,14 @@ ScreenManager:
                 color: 1,1,1,1
                 on_release: root.show_add_form()
 
+            Button:
+                text: "Import"
+                size_hint_x: None
+                width: dp(70)
+                background_color: 1,0,0,1
+                color: 1,1,1,1
+                on_release: root.show_import_popup()
+
 
         # Categories Grid
         GridLayout:
@@ -943,17 +955,31 @@ ScreenManager:
                     pos: self.pos
                     size: self.size
 
-        # Scrollable Contact List
-        ScrollView:
+        # Type-ahead search over names and phone digits
+        TextInput:
+            id: contact_search
+            hint_text: "Search name or number"
+            multiline: False
+            size_hint_y: None
+            height: dp(40)
+            background_color: 1,1,1,1
+            foreground_color: 0,0,0,1
+            on_text: root.on_search_text(self.text)
+
+        # Scrollable Contact List (recycled rows, see contacts.ContactRow)
+        RecycleView:
+            id: contacts_rv
+            viewclass: "ContactRow"
             size_hint_y: 1
             do_scroll_x: False
 
-            GridLayout:
-                id: contacts_grid
-                cols: 1
-                spacing: dp(5)
+            RecycleBoxLayout:
+                orientation: "vertical"
+                default_size: None, dp(60)
+                default_size_hint: 1, None
                 size_hint_y: None
                 height: self.minimum_height
+                spacing: dp(5)
                 padding: dp(5)
 
         # Add Contact Form (hidden by default)
@@ -1358,6 +1384,18 @@ class SOSApp(MDApp):
         self.theme_cls.theme_style = "Light"
         self.login_attempts = 0
 
+        # One SOS trigger service for the whole app; screens only update it.
+        # Sensors and the floating button start in on_start, once root exists.
+        settings = get_settings()
+        self.shake_voice_handler = SOSHandler(
+            app=self,
+            settings=settings.as_dict(),
+            contacts=contacts.contacts,
+            autostart=False
+        )
+        # Setting changes reach the handler batched, once per frame
+        settings.observe(self.shake_voice_handler.update_settings)
+
         self.screen_manager = Builder.load_string(KV)
 
         # Setup country dropdown
@@ -1386,6 +1424,14 @@ class SOSApp(MDApp):
         contact_field.text = self.selected_country_code + " "
         contact_field.cursor = (len(contact_field.text), 0)  # place cursor at end
 
+        # Finish any SOS sends a previous run was killed in the middle of
+        get_dispatcher().replay_outbox()
+
+        self.shake_voice_handler.apply_settings()
+
+    def on_stop(self):
+        get_settings().flush()
+
     def select_country_code(self, code):
         """Called when a country is selected from dropdown."""
         self.selected_country_code = code
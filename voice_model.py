@@ -0,0 +1,139 @@
+# voice_model.py
+"""
+Process-wide cache of Vosk models.
+
+Loading a model takes seconds, so it is done once per path on a background
+thread; every user acquires it and gets a callback once it is ready. Users
+are reference counted and the model is dropped (and its memory freed) when
+the last one releases it. Callbacks run on the loader thread, or right away
+on the caller's thread when the model is already loaded.
+"""
+import glob, os, threading
+
+try:
+    from vosk import Model, KaldiRecognizer
+except ImportError:
+    Model = KaldiRecognizer = None
+
+MODEL_DIR = os.path.join(os.getcwd(), "vosk-model")
+DEFAULT_LANGUAGE = "en"
+LANGUAGE_MODELS = {
+    # language: model directory inside MODEL_DIR
+    "en": "vosk-model-small-en-us-0.15",
+}
+MODEL_PATH = os.path.join(MODEL_DIR, LANGUAGE_MODELS[DEFAULT_LANGUAGE])
+SAMPLE_RATE = 16000
+
+
+def model_path_for(language):
+    """Model directory for `language`: LANGUAGE_MODELS, else any vosk-model-small-<language>* download."""
+    name = LANGUAGE_MODELS.get(language)
+    if name:
+        return os.path.join(MODEL_DIR, name)
+    found = sorted(glob.glob(os.path.join(MODEL_DIR, f"vosk-model-small-{language}*")))
+    return found[-1] if found else os.path.join(MODEL_DIR, f"vosk-model-small-{language}")
+
+
+class _Entry:
+    __slots__ = ("model", "refs", "waiting", "loading")
+
+    def __init__(self):
+        self.model = None
+        self.refs = 0
+        self.waiting = []
+        self.loading = False
+
+
+class ModelCache:
+    def __init__(self, loader=None):
+        self._load = loader or Model
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, path=MODEL_PATH, callback=None):
+        """
+        Take a reference on the model at `path` and call `callback(model)`
+        once it is loaded (`callback(None)` if loading failed).
+        """
+        with self._lock:
+            entry = self._entries.setdefault(path, _Entry())
+            entry.refs += 1
+            model = entry.model
+            if model is None:
+                if callback:
+                    entry.waiting.append(callback)
+                if not entry.loading:
+                    entry.loading = True
+                    threading.Thread(target=self._load_model, args=(path, entry),
+                                     name="vosk-model-loader", daemon=True).start()
+                return
+        if callback:
+            callback(model)
+
+    def release(self, path=MODEL_PATH):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.refs == 0:
+                return
+            entry.refs -= 1
+            if entry.refs == 0:
+                # A load still in flight is dropped when it finishes
+                entry.model = None
+                entry.waiting = []
+                if not entry.loading:
+                    del self._entries[path]
+
+    def refs(self, path=MODEL_PATH):
+        with self._lock:
+            entry = self._entries.get(path)
+            return entry.refs if entry else 0
+
+    def loaded(self, path=MODEL_PATH):
+        with self._lock:
+            entry = self._entries.get(path)
+            return entry is not None and entry.model is not None
+
+    def _load_model(self, path, entry):
+        try:
+            print(f"[DEBUG] Loading Vosk model from {path}")
+            model = self._load(path)
+        except Exception as e:
+            print("[ERROR] Failed to load Vosk model:", e)
+            model = None
+
+        with self._lock:
+            entry.loading = False
+            waiting, entry.waiting = entry.waiting, []
+            if entry.refs == 0 or model is None:
+                # Everyone released it while it loaded, or it failed; don't cache
+                if self._entries.get(path) is entry:
+                    del self._entries[path]
+                if entry.refs == 0:
+                    return
+            else:
+                entry.model = model
+        for callback in waiting:
+            try:
+                callback(model)
+            except Exception as e:
+                print("[ERROR] Model callback failed:", e)
+
+
+def make_recognizer(model, grammar=None, rate=SAMPLE_RATE):
+    """A fresh recognizer on a shared model; `grammar` is a JSON list of phrases."""
+    if grammar is not None:
+        return KaldiRecognizer(model, rate, grammar)
+    return KaldiRecognizer(model, rate)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_model_cache():
+    """App-wide model cache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ModelCache()
+        return _cache
@@ -0,0 +1,124 @@
+# voice_vad.py
+"""
+Energy / zero-crossing voice activity gate in front of the Vosk recognizer.
+
+Each chunk of 16-bit mono PCM is split into FRAME_MS frames. A frame counts
+as speech when its RMS clears both MIN_RMS and SNR times the tracked noise
+floor, and its zero-crossing rate is below ZCR_MAX (hiss and clicks cross
+zero far more often than voiced speech). Chunks are only passed on while
+speech is present, plus PREROLL_MS of audio before it so onsets are not
+clipped and HANGOVER_MS after it so pauses inside a phrase do not cut it.
+
+NumPy vectorises the per-frame maths when installed; otherwise the array
+module is used.
+"""
+import math
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FRAME_MS = 30
+PREROLL_MS = 300
+HANGOVER_MS = 400
+MIN_RMS = 300.0        # int16 units; quieter than this is never speech
+SNR = 3.0              # speech must be this many times louder than the noise floor
+ZCR_MAX = 0.35         # zero crossings per sample
+NOISE_ADAPT = 0.05     # EMA weight of non-speech frames in the noise floor
+
+
+class VoiceActivityGate:
+    def __init__(self, rate=16000, frame_ms=FRAME_MS, preroll_ms=PREROLL_MS, hangover_ms=HANGOVER_MS,
+                 min_rms=MIN_RMS, snr=SNR, zcr_max=ZCR_MAX):
+        self.rate = rate
+        self.frame = max(1, int(rate * frame_ms / 1000))
+        self.preroll_samples = int(rate * preroll_ms / 1000)
+        self.hangover_samples = int(rate * hangover_ms / 1000)
+        self.min_rms = min_rms
+        self.snr = snr
+        self.zcr_max = zcr_max
+        self.noise_floor = min_rms / snr
+        self.active = False
+        # Counters
+        self.chunks = 0
+        self.passed = 0
+        self.reset()
+
+    def reset(self):
+        self.active = False
+        self._preroll = deque()
+        self._preroll_len = 0
+        self._since_speech = 0
+
+    def feed(self, data):
+        """
+        Offer one PCM chunk (bytes). Returns (chunks_to_decode, speech_ended):
+        the audio to hand the recognizer now, oldest first, and whether a
+        speech segment just finished (time to ask for its final result).
+        """
+        self.chunks += 1
+        data = data[:len(data) - len(data) % 2]
+        n = len(data) // 2
+        if self._has_speech(data):
+            self._since_speech = 0
+            out = list(self._preroll) + [data] if not self.active else [data]
+            self._preroll.clear()
+            self._preroll_len = 0
+            self.active = True
+            self.passed += len(out)
+            return out, False
+
+        if self.active:
+            self._since_speech += n
+            if self._since_speech <= self.hangover_samples:
+                self.passed += 1
+                return [data], False
+            self.active = False
+            self._remember(data, n)
+            return [], True
+
+        self._remember(data, n)
+        return [], False
+
+    def _remember(self, data, n):
+        self._preroll.append(data)
+        self._preroll_len += n
+        while self._preroll and self._preroll_len - len(self._preroll[0]) // 2 >= self.preroll_samples:
+            self._preroll_len -= len(self._preroll.popleft()) // 2
+
+    def _has_speech(self, data):
+        if np is not None:
+            samples = np.frombuffer(data, dtype=np.int16)
+            usable = len(samples) - len(samples) % self.frame
+            if usable == 0:
+                return False
+            frames = samples[:usable].reshape(-1, self.frame).astype(np.float32)
+            rms = np.sqrt((frames * frames).mean(axis=1))
+            zcr = (np.diff(np.signbit(frames), axis=1) != 0).mean(axis=1)
+            speech = (rms > max(self.min_rms, self.noise_floor * self.snr)) & (zcr < self.zcr_max)
+            quiet = rms[~speech]
+            if len(quiet):
+                self._adapt(float(quiet.mean()))
+            return bool(speech.any())
+
+        samples = array("h")
+        samples.frombytes(data)
+        found, quiet = False, []
+        threshold = max(self.min_rms, self.noise_floor * self.snr)
+        for start in range(0, len(samples) - self.frame + 1, self.frame):
+            frame = samples[start:start + self.frame]
+            rms = math.sqrt(sum(s * s for s in frame) / self.frame)
+            crossings = sum(1 for a, b in zip(frame, frame[1:]) if (a < 0) != (b < 0))
+            if rms > threshold and crossings / (self.frame - 1) < self.zcr_max:
+                found = True
+            else:
+                quiet.append(rms)
+        if quiet:
+            self._adapt(sum(quiet) / len(quiet))
+        return found
+
+    def _adapt(self, rms):
+        self.noise_floor += NOISE_ADAPT * (rms - self.noise_floor)